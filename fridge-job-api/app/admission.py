@@ -0,0 +1,213 @@
+import asyncio
+import math
+import time
+from collections import defaultdict
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from fastapi import HTTPException
+from prometheus_client import Counter
+from .argo_client import ArgoClient
+from .config import (
+    ARGO_MAX_ACTIVE_WORKFLOWS,
+    ARGO_SUBMIT_MAX_IN_FLIGHT,
+    ARGO_SUBMIT_QUEUE_SIZE,
+    ARGO_SUBMIT_QUEUE_TIMEOUT,
+    WORKFLOW_INDEX_ENABLED,
+    WORKFLOW_INDEX_MAX_STALENESS,
+    argo_client,
+    parse_argo_error,
+)
+from .metrics import CallbackMetric
+from .workflow_index import workflow_index
+
+# Phases of workflows that the controller is still working on. Workflows that have
+# just been submitted have no phase yet
+ACTIVE_PHASES = (None, "", "Pending", "Running")
+
+# Without the workflow index, the number of active workflows is counted with a
+# request to Argo at most this often
+ACTIVE_COUNT_SECONDS = 5
+
+# Interval between checks of the number of active workflows while waiting
+ACTIVE_POLL_SECONDS = 1
+
+ADMISSION_REJECTED = Counter(
+    "fridge_admission_rejected_total",
+    "Number of workflow submissions rejected with a 429",
+    labelnames=("reason",),
+)
+
+
+class Admission:
+    """
+    A submission that has been admitted, and whether Argo accepted the workflow.
+    """
+
+    def __init__(self):
+        self.accepted = False
+
+
+class AdmissionController:
+    """
+    Limits the rate at which workflows are submitted to Argo, to protect the workflow
+    controller from bursts of submissions.
+
+    At most `max_in_flight` submissions are sent to Argo at the same time, and none to a
+    namespace that already has `max_active` workflows pending or running (if set).
+    Submissions over these limits wait in a queue of at most `max_queued` submissions
+    for up to `max_wait` seconds, and are otherwise rejected with a 429.
+    """
+
+    def __init__(
+        self,
+        client: ArgoClient,
+        max_in_flight: int,
+        max_active: int,
+        max_queued: int,
+        max_wait: float,
+    ):
+        self.client = client
+        self.max_in_flight = max_in_flight
+        self.max_active = max_active
+        self.max_queued = max_queued
+        self.max_wait = max_wait
+        self.in_flight = 0
+        self.queued = 0
+        self._slots = asyncio.Semaphore(max_in_flight)
+        # Number of active workflows by namespace, and when they were counted
+        self._active: dict[str, tuple[float, int]] = {}
+        # Number of workflows being submitted, by namespace
+        self._submitting: dict[str, int] = defaultdict(int)
+
+    @asynccontextmanager
+    async def admit(self, namespace: str) -> AsyncIterator[Admission]:
+        """
+        Wait for a workflow to be allowed to be submitted to a namespace, and submit it
+        in the body of the `async with` block. Set `accepted` on the admission once Argo
+        has accepted the workflow, so that it is counted as active.
+        """
+        if self.queued >= self.max_queued:
+            raise self._reject(
+                "queue_full", "Too many workflow submissions are queued."
+            )
+        self.queued += 1
+        try:
+            await self._wait(namespace, time.monotonic() + self.max_wait)
+        finally:
+            self.queued -= 1
+
+        admitted = Admission()
+        self.in_flight += 1
+        self._submitting[namespace] += 1
+        try:
+            yield admitted
+        finally:
+            self.in_flight -= 1
+            self._submitting[namespace] -= 1
+            self._slots.release()
+            if admitted.accepted and namespace in self._active:
+                counted_at, count = self._active[namespace]
+                self._active[namespace] = (counted_at, count + 1)
+
+    async def _wait(self, namespace: str, deadline: float) -> None:
+        """
+        Wait for the namespace to have room for another workflow and for a submission
+        slot, then check the namespace again as it may have filled up in the meantime.
+        """
+        while True:
+            await self._wait_for_room(namespace, deadline)
+            await self._acquire_slot(deadline)
+            try:
+                if not await self._is_full(namespace):
+                    return
+            except BaseException:
+                self._slots.release()
+                raise
+            self._slots.release()
+
+    async def _wait_for_room(self, namespace: str, deadline: float) -> None:
+        while await self._is_full(namespace):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise self._reject(
+                    "active_workflows",
+                    f"Too many workflows are pending or running in {namespace}.",
+                )
+            await asyncio.sleep(min(ACTIVE_POLL_SECONDS, remaining))
+
+    async def _acquire_slot(self, deadline: float) -> None:
+        if not self._slots.locked():
+            await self._slots.acquire()
+            return
+        try:
+            await asyncio.wait_for(
+                self._slots.acquire(), max(deadline - time.monotonic(), 0)
+            )
+        except TimeoutError:
+            raise self._reject(
+                "in_flight", "Too many workflow submissions are in progress."
+            )
+
+    async def _is_full(self, namespace: str) -> bool:
+        """
+        Whether the namespace has `max_active` workflows, counting those being submitted.
+        """
+        if not self.max_active:
+            return False
+        active = await self._active_workflows(namespace)
+        return active + self._submitting[namespace] >= self.max_active
+
+    async def _active_workflows(self, namespace: str) -> int:
+        """
+        Count the pending and running workflows in a namespace, from the workflow index
+        if it is enabled and in sync, or otherwise from Argo.
+        """
+        if WORKFLOW_INDEX_ENABLED:
+            informer = await workflow_index.informer(namespace)
+            if informer.staleness() <= WORKFLOW_INDEX_MAX_STALENESS:
+                return sum(len(informer.by_phase[phase]) for phase in ACTIVE_PHASES)
+
+        counted_at, count = self._active.get(namespace, (0.0, 0))
+        if time.monotonic() - counted_at > ACTIVE_COUNT_SECONDS:
+            r = await self.client.get(
+                f"/api/v1/workflows/{namespace}",
+                params={
+                    "listOptions.labelSelector": "workflows.argoproj.io/completed!=true",
+                    "fields": "items.metadata.name",
+                },
+            )
+            if r.status_code != 200:
+                raise HTTPException(
+                    status_code=r.status_code, detail=parse_argo_error(r.json())
+                )
+            count = len(r.json().get("items") or [])
+            self._active[namespace] = (time.monotonic(), count)
+        return count
+
+    def _reject(self, reason: str, detail: str) -> HTTPException:
+        ADMISSION_REJECTED.labels(reason).inc()
+        return HTTPException(
+            status_code=429,
+            detail=detail,
+            headers={"Retry-After": str(max(math.ceil(self.max_wait), 1))},
+        )
+
+
+admission = AdmissionController(
+    argo_client,
+    max_in_flight=ARGO_SUBMIT_MAX_IN_FLIGHT,
+    max_active=ARGO_MAX_ACTIVE_WORKFLOWS,
+    max_queued=ARGO_SUBMIT_QUEUE_SIZE,
+    max_wait=ARGO_SUBMIT_QUEUE_TIMEOUT,
+)
+
+CallbackMetric(
+    "fridge_admission_in_flight",
+    "Number of workflow submissions being sent to Argo",
+    callback=lambda: {(): admission.in_flight},
+)
+CallbackMetric(
+    "fridge_admission_queued",
+    "Number of workflow submissions waiting to be sent to Argo",
+    callback=lambda: {(): admission.queued},
+)
@@ -0,0 +1,247 @@
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from fastapi import HTTPException
+from .instrumentation import count_upstream_bytes, timed, upstream_call
+from .resilience import CircuitBreaker, RetryBudget
+from .single_flight import SingleFlight
+from .tracing import span, trace_headers
+
+import asyncio
+import httpx
+import random
+
+# Responses that are worth retrying: rate limiting and transient server errors
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+# Requests that are not idempotent, like workflow submissions, may already have been
+# processed by Argo after a timeout or a server error, so they are only retried after
+# errors before the request was sent, and responses showing it was not processed
+UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+UNPROCESSED_STATUS_CODES = {429, 503}
+RETRY_BACKOFF_SECONDS = 0.5
+RETRY_MAX_BACKOFF_SECONDS = 10
+
+
+class ArgoClient:
+    """
+    Shared asynchronous client for the Argo Workflows API.
+
+    A single connection pool is opened when the application starts and reused by every
+    route, so requests to Argo keep their connections (and TLS sessions) alive and
+    concurrent requests do not block the event loop.
+
+    Every request goes through a circuit breaker, so that requests fail fast with a 503
+    while Argo is unhealthy, and retries are limited by a shared retry budget.
+    """
+
+    def __init__(
+        self,
+        server: str,
+        token: Callable[[], str],
+        verify: bool = True,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        timeout: httpx.Timeout = httpx.Timeout(60, connect=5),
+        get_retries: int = 2,
+        breaker: CircuitBreaker | None = None,
+        retry_budget: RetryBudget | None = None,
+        http2: bool = False,
+    ):
+        self.server = server
+        self.token = token
+        self.verify = verify
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+        )
+        self.timeout = timeout
+        self.http2 = http2
+        # Streams (logs and watches) can stay open for a long time, so only the time
+        # taken to connect is limited
+        self.stream_timeout = httpx.Timeout(None, connect=timeout.connect)
+        self.get_retries = get_retries
+        self.breaker = breaker or CircuitBreaker("Argo")
+        self.retry_budget = retry_budget or RetryBudget()
+        self.flights = SingleFlight("argo")
+        self.client: httpx.AsyncClient | None = None
+
+    async def open(self) -> None:
+        """Create the connection pool. Called once on application startup."""
+        if self.client is None:
+            self.client = httpx.AsyncClient(
+                base_url=self.server or "",
+                verify=self.verify,
+                limits=self.limits,
+                timeout=self.timeout,
+                http2=self.http2,
+            )
+
+    async def close(self) -> None:
+        """Close the connection pool. Called once on application shutdown."""
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    def _headers(self) -> dict:
+        # The token is looked up on every request as it is rotated by Kubernetes
+        with timed("token"):
+            token = self.token()
+        return {"Authorization": f"Bearer {token}"} | trace_headers()
+
+    def _client(self) -> httpx.AsyncClient:
+        if self.client is None:
+            raise HTTPException(
+                status_code=500, detail="Argo client has not been initialised."
+            )
+        return self.client
+
+    async def get(
+        self,
+        path: str,
+        params: dict | None = None,
+        timeout: float | httpx.Timeout | None = httpx.USE_CLIENT_DEFAULT,
+        retries: int | None = None,
+    ) -> httpx.Response:
+        """
+        Send a GET request, retried up to `get_retries` times by default.
+        Identical GET requests made while one is already in flight share its response.
+        """
+        retries = self.get_retries if retries is None else retries
+        return await self.flights.do(
+            (path, repr(params), repr(timeout), retries),
+            lambda: self._send(
+                "GET", path, retries=retries, params=params, timeout=timeout
+            ),
+        )
+
+    async def post(
+        self, path: str, json: dict | None = None, retries: int = 0
+    ) -> httpx.Response:
+        return await self._send("POST", path, retries=retries, json=json)
+
+    async def _send(
+        self, method: str, path: str, retries: int, stream: bool = False, **kwargs
+    ) -> httpx.Response:
+        """
+        Send a request. Up to `retries` times, and while the retry budget allows, requests
+        that are rate limited, fail with a server error or fail to connect are retried with
+        exponential backoff. Requests other than GETs are only retried when they cannot
+        have been processed by Argo.
+
+        With `stream`, the response body is not read, and the caller is responsible for
+        closing the response with `aclose()`.
+        """
+        if method == "GET":
+            retry_errors, retry_status_codes = httpx.TransportError, RETRY_STATUS_CODES
+        else:
+            retry_errors, retry_status_codes = UNSENT_ERRORS, UNPROCESSED_STATUS_CODES
+        self.retry_budget.deposit()
+        client = self._client()
+        attempt = 0
+        while True:
+            self.breaker.check()
+            try:
+                with _observe(method, path):
+                    request = client.build_request(
+                        method, path, headers=self._headers(), **kwargs
+                    )
+                    r = await client.send(request, stream=stream)
+            except httpx.TransportError as e:
+                self.breaker.record_failure()
+                if (
+                    not isinstance(e, retry_errors)
+                    or attempt >= retries
+                    or not self.retry_budget.withdraw()
+                ):
+                    raise
+                delay = _backoff(attempt)
+            else:
+                self._record(r)
+                count_upstream_bytes(
+                    len(request.content) + (0 if stream else len(r.content))
+                )
+                if (
+                    r.status_code not in retry_status_codes
+                    or attempt >= retries
+                    or not self.retry_budget.withdraw()
+                ):
+                    return r
+                delay = _retry_after(r) or _backoff(attempt)
+                if stream:
+                    await r.aclose()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def stream(
+        self,
+        path: str,
+        params: dict | None = None,
+        method: str = "GET",
+        json: dict | None = None,
+        timeout: httpx.Timeout | None = None,
+        retries: int = 0,
+    ) -> httpx.Response:
+        """
+        Send a request (a GET by default) without reading the response body, with no
+        read timeout unless one is given. Up to `retries` times, the request is retried
+        as in `_send` if it fails before the response starts.
+        The caller is responsible for closing the response with `aclose()`.
+        """
+        return await self._send(
+            method,
+            path,
+            retries=retries,
+            stream=True,
+            params=params,
+            json=json,
+            timeout=timeout or self.stream_timeout,
+        )
+
+    def _record(self, r: httpx.Response) -> None:
+        # Rate limiting and client errors show that Argo is up; server errors do not
+        if r.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+
+@contextmanager
+def _observe(method: str, path: str) -> Iterator[None]:
+    """Time a request to Argo for the metrics, and trace it as a span."""
+    operation = _operation(method, path)
+    with span(
+        f"argo.{operation}", **{"http.request.method": method, "url.path": path}
+    ), upstream_call("argo", operation):
+        yield
+
+
+def _operation(method: str, path: str) -> str:
+    """
+    Name the Argo operation for a request, for metrics, e.g. "submit", "list" or
+    "template_get".
+    """
+    # Paths are /api/v1/<resource>/<namespace>/<name>/<action>
+    parts = path.strip("/").split("/")[2:]
+    if len(parts) < 2:
+        return parts[0] if parts else "unknown"
+    if parts[-1] in ("submit", "log"):
+        return parts[-1]
+    if parts[0] == "workflow-events":
+        return "watch"
+    if method == "POST":
+        return "create"
+    prefix = "template_" if parts[0] == "workflow-templates" else ""
+    return prefix + ("list" if len(parts) == 2 else "get")
+
+
+def _backoff(attempt: int) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(
+        0, min(RETRY_BACKOFF_SECONDS * 2**attempt, RETRY_MAX_BACKOFF_SECONDS)
+    )
+
+
+def _retry_after(r: httpx.Response) -> float | None:
+    try:
+        return min(float(r.headers["Retry-After"]), RETRY_MAX_BACKOFF_SECONDS)
+    except (KeyError, ValueError):
+        return None
@@ -1,11 +1,23 @@
+import base64
+import httpx
+import itertools
+import json
 import os
+import time
+import urllib3
 from dotenv import load_dotenv
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
 from importlib.metadata import PackageNotFoundError, version
 from pydantic import BaseModel
+from typing import Literal
 from secrets import compare_digest
+from app.argo_client import ArgoClient
 from app.minio_client import MinioClient
+from app.instrumentation import timed
+from app.metrics import CallbackMetric
+from app.resilience import CircuitBreaker, RetryBudget
+from app.tracing import traced
 
 load_dotenv()
 
@@ -54,6 +66,78 @@ else:
     FRIDGE_API_PASSWORD = os.getenv("FRIDGE_API_PASSWORD")
     ARGO_SERVER = os.getenv("ARGO_SERVER")
 
+# Page size used when streaming workflow lists from Argo
+ARGO_LIST_PAGE_SIZE = int(os.getenv("ARGO_LIST_PAGE_SIZE", 500))
+
+# Aggregated workflow logs keep a connection to Argo open for every pod until the log has
+# been read, from a pool of ARGO_LOG_MAX_CONNECTIONS kept apart from other requests.
+# At most ARGO_LOG_CONCURRENCY pod logs are opened at the same time, and workflows with
+# more than ARGO_LOG_MAX_PODS pods are rejected
+ARGO_LOG_CONCURRENCY = int(os.getenv("ARGO_LOG_CONCURRENCY", 8))
+ARGO_LOG_MAX_CONNECTIONS = int(os.getenv("ARGO_LOG_MAX_CONNECTIONS", 100))
+ARGO_LOG_MAX_PODS = min(
+    int(os.getenv("ARGO_LOG_MAX_PODS", 50)), ARGO_LOG_MAX_CONNECTIONS
+)
+
+# Limits for submitting a batch of workflows: the maximum number of submissions sent
+# to Argo at the same time, and the number of retries for each submission
+ARGO_SUBMIT_MAX_CONCURRENCY = int(os.getenv("ARGO_SUBMIT_MAX_CONCURRENCY", 50))
+ARGO_SUBMIT_RETRIES = int(os.getenv("ARGO_SUBMIT_RETRIES", 3))
+# Maximum number of parameter sets in a batch of workflows
+ARGO_BATCH_MAX_SIZE = int(os.getenv("ARGO_BATCH_MAX_SIZE", 1000))
+# Admission control for workflow submissions: the maximum number sent to Argo at the
+# same time, the maximum number of pending or running workflows in a namespace (0 for no
+# limit), and how many submissions can wait, and for how many seconds, before a 429
+ARGO_SUBMIT_MAX_IN_FLIGHT = int(os.getenv("ARGO_SUBMIT_MAX_IN_FLIGHT", 20))
+ARGO_MAX_ACTIVE_WORKFLOWS = int(os.getenv("ARGO_MAX_ACTIVE_WORKFLOWS", 0))
+ARGO_SUBMIT_QUEUE_SIZE = int(os.getenv("ARGO_SUBMIT_QUEUE_SIZE", 100))
+ARGO_SUBMIT_QUEUE_TIMEOUT = float(os.getenv("ARGO_SUBMIT_QUEUE_TIMEOUT", 10))
+# Maximum number of runs in a parameter sweep workflow
+ARGO_SWEEP_MAX_RUNS = int(os.getenv("ARGO_SWEEP_MAX_RUNS", 1000))
+
+# Answer non-verbose workflow reads from an in-memory index kept up to date by watching Argo
+WORKFLOW_INDEX_ENABLED = os.getenv("WORKFLOW_INDEX_ENABLED", "False") == "True"
+# Fall back to Argo when the index has been out of sync for longer than this
+WORKFLOW_INDEX_MAX_STALENESS = float(os.getenv("WORKFLOW_INDEX_MAX_STALENESS", 30))
+
+# Serialise workflow listings directly to JSON, without building a model per workflow
+FAST_RESPONSES = os.getenv("FAST_RESPONSES", "False") == "True"
+
+# Use HTTP/2 for requests to Argo, so that concurrent requests are multiplexed over a
+# few TLS connections. Only used when the Argo server negotiates HTTP/2 over TLS
+ARGO_HTTP2 = os.getenv("ARGO_HTTP2", "False") == "True"
+
+# Timeouts in seconds for requests to Argo and MinIO, and the number of times failed
+# reads are retried
+ARGO_CONNECT_TIMEOUT = float(os.getenv("ARGO_CONNECT_TIMEOUT", 5))
+ARGO_READ_TIMEOUT = float(os.getenv("ARGO_READ_TIMEOUT", 60))
+ARGO_GET_RETRIES = int(os.getenv("ARGO_GET_RETRIES", 2))
+MINIO_CONNECT_TIMEOUT = float(os.getenv("MINIO_CONNECT_TIMEOUT", 5))
+MINIO_READ_TIMEOUT = float(os.getenv("MINIO_READ_TIMEOUT", 60))
+MINIO_RETRIES = int(os.getenv("MINIO_RETRIES", 2))
+
+# Size in bytes of the parts objects are uploaded to MinIO in, and the number of parts
+# of an object uploaded at the same time. Uploads are streamed, so memory use per upload
+# is bounded by MINIO_PART_SIZE * (MINIO_UPLOAD_CONCURRENCY + 1) whatever the object size
+MINIO_PART_SIZE = int(os.getenv("MINIO_PART_SIZE", 16 * 1024 * 1024))
+MINIO_UPLOAD_CONCURRENCY = int(os.getenv("MINIO_UPLOAD_CONCURRENCY", 4))
+# Maximum size in bytes of a part uploaded to an upload session, which is held in memory
+# while it is sent to MinIO. MinIO does not accept parts over 5 GiB
+MINIO_MAX_PART_SIZE = min(
+    int(os.getenv("MINIO_MAX_PART_SIZE", 128 * 1024 * 1024)), 5 * 1024 * 1024 * 1024
+)
+
+# Maximum number of seconds a presigned URL for direct transfers to or from MinIO is
+# valid for
+MINIO_PRESIGN_MAX_EXPIRY = int(os.getenv("MINIO_PRESIGN_MAX_EXPIRY", 3600))
+
+# Circuit breakers stop sending requests to Argo or MinIO for UPSTREAM_RESET_TIMEOUT
+# seconds after UPSTREAM_FAILURE_THRESHOLD consecutive failures. Retries are limited
+# to UPSTREAM_RETRY_BUDGET retries per request
+UPSTREAM_FAILURE_THRESHOLD = int(os.getenv("UPSTREAM_FAILURE_THRESHOLD", 5))
+UPSTREAM_RESET_TIMEOUT = float(os.getenv("UPSTREAM_RESET_TIMEOUT", 30))
+UPSTREAM_RETRY_BUDGET = float(os.getenv("UPSTREAM_RETRY_BUDGET", 0.2))
+
 # Disable TLS verification in development mode
 VERIFY_TLS = os.getenv("VERIFY_TLS", "False") == "True"
 if not VERIFY_TLS:
@@ -61,17 +145,83 @@ if not VERIFY_TLS:
         "Warning: TLS verification is disabled. This is not secure and should only be used in development environments."
     )
 
+
+class ServiceAccountToken:
+    """
+    A service account token read from a file on a projected volume, cached in memory.
+
+    The file is checked at most once every `check_interval` seconds, or on every call once
+    the token is close to expiry, and the token is only read again if the file has changed.
+    """
+
+    def __init__(
+        self, path: str, check_interval: float = 1.0, expiry_margin: float = 60.0
+    ):
+        self.path = path
+        self.check_interval = check_interval
+        self.expiry_margin = expiry_margin
+        self.token: str | None = None
+        self.expires_at: float | None = None
+        self.reloads = 0
+        self._file_id: tuple | None = None
+        self._checked_at = 0.0
+
+    def get(self) -> str:
+        now = time.monotonic()
+        if (
+            self.token is None
+            or now - self._checked_at >= self.check_interval
+            or self._expiring()
+        ):
+            self._checked_at = now
+            # Kubernetes replaces the file (through a symlink) when the token is rotated
+            stat = os.stat(self.path)
+            file_id = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            if file_id != self._file_id:
+                self._load(file_id)
+        return self.token
+
+    def _load(self, file_id: tuple) -> None:
+        with open(self.path, "r") as f:
+            self.token = f.read().strip()
+        self._file_id = file_id
+        self.expires_at = _jwt_expiry(self.token)
+        self.reloads += 1
+
+    def _expiring(self) -> bool:
+        return (
+            self.expires_at is not None
+            and time.time() > self.expires_at - self.expiry_margin
+        )
+
+
+def _jwt_expiry(token: str) -> float | None:
+    """
+    Read the expiry time of a JWT, without verifying it.
+    """
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(
+            base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4))
+        )
+        return float(claims["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
 # On the Kubernetes cluster, the Argo token is stored in a service account token file on a projected volume
 # The token expires after one hour; the file on the volume is updated automatically by Kubernetes
-# Reading the token from the file when required ensures that we always use a valid token
+# The token is cached and read again from the file when it changes, so that we always use a valid token
 # If not running in the cluster, we use the ARGO_TOKEN environment variable
+service_account_token = ServiceAccountToken("/service-account/token")
+
+
 def argo_token() -> str:
     """
     Load the ARGO token on request from the environment variable or from the service account token file if running in a Kubernetes cluster.
     """
     if os.getenv("KUBERNETES_SERVICE_HOST"):
-        with open("/service-account/token", "r") as f:
-            ARGO_TOKEN = f.read().strip()
+        ARGO_TOKEN = service_account_token.get()
     else:
         ARGO_TOKEN = os.getenv("ARGO_TOKEN")
         if ARGO_TOKEN is None:
@@ -92,6 +242,51 @@ minio_client = MinioClient(
     access_key=os.getenv("MINIO_ACCESS_KEY", None),
     secret_key=os.getenv("MINIO_SECRET_KEY", None),
     secure=os.getenv("MINIO_SECURE", True),
+    timeout=urllib3.Timeout(connect=MINIO_CONNECT_TIMEOUT, read=MINIO_READ_TIMEOUT),
+    retries=MINIO_RETRIES,
+    part_size=MINIO_PART_SIZE,
+    upload_concurrency=MINIO_UPLOAD_CONCURRENCY,
+    presign_max_expiry=MINIO_PRESIGN_MAX_EXPIRY,
+    breaker=CircuitBreaker("MinIO", UPSTREAM_FAILURE_THRESHOLD, UPSTREAM_RESET_TIMEOUT),
+    retry_budget=RetryBudget(UPSTREAM_RETRY_BUDGET),
+)
+
+CallbackMetric(
+    "fridge_token_refreshes_total",
+    "Number of times the Argo service account token or MinIO credentials were refreshed",
+    labelnames=("token",),
+    callback=lambda: {
+        ("argo",): service_account_token.reloads,
+        ("minio",): minio_client.token_refreshes,
+    },
+    counter=True,
+)
+
+# Shared Argo client. The connection pool is opened and closed with the application lifespan
+argo_client = ArgoClient(
+    server=ARGO_SERVER,
+    token=argo_token,
+    verify=VERIFY_TLS,
+    max_connections=int(os.getenv("ARGO_MAX_CONNECTIONS", 100)),
+    max_keepalive_connections=int(os.getenv("ARGO_MAX_KEEPALIVE_CONNECTIONS", 20)),
+    timeout=httpx.Timeout(ARGO_READ_TIMEOUT, connect=ARGO_CONNECT_TIMEOUT),
+    get_retries=ARGO_GET_RETRIES,
+    breaker=CircuitBreaker("Argo", UPSTREAM_FAILURE_THRESHOLD, UPSTREAM_RESET_TIMEOUT),
+    retry_budget=RetryBudget(UPSTREAM_RETRY_BUDGET),
+    http2=ARGO_HTTP2,
+)
+
+# Argo client for aggregated logs, with its own connection pool so that long-lived log
+# streams cannot use up the connections of other requests
+argo_log_client = ArgoClient(
+    server=ARGO_SERVER,
+    token=argo_token,
+    verify=VERIFY_TLS,
+    max_connections=ARGO_LOG_MAX_CONNECTIONS,
+    timeout=argo_client.timeout,
+    breaker=argo_client.breaker,
+    retry_budget=argo_client.retry_budget,
+    http2=ARGO_HTTP2,
 )
 
 
@@ -102,12 +297,42 @@ class Workflow(BaseModel):
     created_at: str | None = None
 
 
+class WorkflowStatus(BaseModel):
+    status: str | None = None
+    started_at: str | None = None
+    finished_at: str | None = None
+
+
+class WorkflowStatusQuery(BaseModel):
+    # Names of the workflows to look up, and/or a Kubernetes label selector
+    names: list[str] | None = None
+    label_selector: str | None = None
+
+
 class WorkflowTemplate(BaseModel):
     namespace: str
     template_name: str
     parameters: list[dict] | None = None
 
 
+class WorkflowTemplateBatch(BaseModel):
+    namespace: str
+    template_name: str
+    parameter_sets: list[list[dict]]
+
+
+class WorkflowSweep(BaseModel):
+    namespace: str
+    template_name: str
+    # Parameters shared by every run of the sweep
+    parameters: list[dict] | None = None
+    # Values of each swept parameter, combined as a cartesian product or zipped together
+    grid: dict[str, list[str]]
+    mode: Literal["product", "zip"] = "product"
+    # Maximum number of runs at the same time
+    parallelism: int | None = None
+
+
 def parse_argo_error(response: dict) -> dict | None:
     """
     Check for errors in the Argo Workflows response and return those errors if any.
@@ -134,31 +359,58 @@ def parse_argo_error(response: dict) -> dict | None:
             pass
 
 
+# Fields used by extract_argo_workflow, requested from Argo for non-verbose responses
+# so that large fields such as status.nodes are not sent over the wire
+WORKFLOW_FIELDS = [
+    "metadata.name",
+    "metadata.namespace",
+    "metadata.creationTimestamp",
+    "status.phase",
+]
+WORKFLOW_GET_FIELDS = ",".join(WORKFLOW_FIELDS)
+WORKFLOW_STATUS_FIELDS = ",".join(
+    [
+        "metadata",
+        "items.metadata.name",
+        "items.status.phase",
+        "items.status.startedAt",
+        "items.status.finishedAt",
+    ]
+)
+WORKFLOW_LIST_FIELDS = ",".join(
+    ["metadata"] + [f"items.{field}" for field in WORKFLOW_FIELDS]
+)
+
+
 def extract_argo_workflows(response: dict) -> list[Workflow] | Workflow | dict:
     """
     Parse the Argo response to extract workflow information.
     """
-    workflows = []
     if "items" in response:
         if not response["items"]:
             return {"message": "No workflows found in the specified namespace."}
-        for item in response["items"]:
-            workflow = Workflow(
-                name=item.get("metadata", {}).get("name"),
-                namespace=item.get("metadata", {}).get("namespace"),
-                status=item.get("status", {}).get("phase"),
-                created_at=item.get("metadata", {}).get("creationTimestamp"),
-            )
-            workflows.append(workflow)
-        return workflows
+        return [extract_argo_workflow(item) for item in response["items"]]
     else:
-        workflow = Workflow(
-            name=response.get("metadata", {}).get("name"),
-            namespace=response.get("metadata", {}).get("namespace"),
-            status=response.get("status", {}).get("phase"),
-            created_at=response.get("metadata", {}).get("creationTimestamp"),
-        )
-        return workflow
+        return extract_argo_workflow(response)
+
+
+def extract_argo_workflow(item: dict) -> Workflow:
+    """
+    Extract the workflow information from a single Argo workflow object.
+    """
+    return Workflow(**workflow_fields(item))
+
+
+def workflow_fields(item: dict) -> dict:
+    """
+    The fields of a `Workflow` from a single Argo workflow object, as a plain dict.
+    """
+    return {
+        "name": item.get("metadata", {}).get("name"),
+        "namespace": item.get("metadata", {}).get("namespace"),
+        "status": item.get("status", {}).get("phase"),
+        "created_at": item.get("metadata", {}).get("creationTimestamp"),
+    }
 
 
 def extract_argo_workflow_templates(
@@ -192,6 +444,61 @@ def extract_argo_workflow_templates(
         return workflow
 
 
+def list_options(limit: int | None = None, continue_token: str | None = None) -> dict:
+    """
+    Build the Argo list options query parameters used for pagination.
+    """
+    params = {}
+    if limit:
+        params["listOptions.limit"] = limit
+    if continue_token:
+        params["listOptions.continue"] = continue_token
+    return params
+
+
+def workflow_pods(workflow: dict) -> dict[str, str]:
+    """
+    Get the pods of a workflow from its status nodes, as a mapping of node name to pod name.
+    Pod names are derived from the nodes in the same way as the Argo controller.
+    """
+    workflow_name = workflow.get("metadata", {}).get("name")
+    annotations = workflow.get("metadata", {}).get("annotations") or {}
+    pod_name_format = annotations.get("workflows.argoproj.io/pod-name-format", "v2")
+    nodes = (workflow.get("status", {}).get("nodes") or {}).values()
+    return {
+        node["name"]: (
+            node["id"]
+            if pod_name_format == "v1"
+            else _pod_name(workflow_name, node["name"], _node_template_name(node))
+        )
+        for node in nodes
+        if node.get("type") == "Pod"
+    }
+
+
+def _node_template_name(node: dict) -> str:
+    if node.get("templateName"):
+        return node["templateName"]
+    return (node.get("templateRef") or {}).get("template", "")
+
+
+def _pod_name(workflow_name: str, node_name: str, template_name: str) -> str:
+    if workflow_name == node_name:
+        return workflow_name
+    # Pods of inline templates are not named after their template
+    if template_name and ".inline" not in node_name:
+        prefix = f"{workflow_name}-{template_name}"
+    else:
+        prefix = workflow_name
+    # Leave room for the hash within the Kubernetes name length limit of 253
+    prefix = prefix[:242]
+    # 32-bit FNV-1a hash of the node name
+    node_hash = 0x811C9DC5
+    for byte in node_name.encode("utf-8"):
+        node_hash = ((node_hash ^ byte) * 0x01000193) & 0xFFFFFFFF
+    return f"{prefix}-{node_hash}"
+
+
 def parse_parameters(parameters: list[dict]) -> list[str]:
     """
     Parse the parameters from the workflow template into a list of strings.
@@ -203,6 +510,134 @@ def parse_parameters(parameters: list[dict]) -> list[str]:
     ]
 
 
+# Workflow spec fields copied from a workflow template to a sweep workflow, so that the
+# runs have the same pod environment as when the template is submitted directly
+SWEEP_SPEC_FIELDS = [
+    "affinity",
+    "artifactRepositoryRef",
+    "automountServiceAccountToken",
+    "executor",
+    "imagePullSecrets",
+    "nodeSelector",
+    "podGC",
+    "podMetadata",
+    "securityContext",
+    "serviceAccountName",
+    "tolerations",
+    "ttlStrategy",
+    "volumeClaimTemplates",
+    "volumes",
+]
+
+
+def sweep_items(sweep: WorkflowSweep) -> list[dict]:
+    """
+    Expand the parameter grid of a sweep into one item per run.
+    """
+    names = list(sweep.grid)
+    values = [sweep.grid[name] for name in names]
+    if not names:
+        raise HTTPException(
+            status_code=400, detail="The sweep grid must have at least one parameter."
+        )
+    if empty := [name for name in names if not sweep.grid[name]]:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Swept parameters must have at least one value: {', '.join(empty)}.",
+        )
+    if sweep.mode == "zip":
+        if len({len(value) for value in values}) > 1:
+            raise HTTPException(
+                status_code=400,
+                detail="All parameters must have the same number of values to be zipped.",
+            )
+        combinations = zip(*values)
+    else:
+        combinations = itertools.product(*values)
+    return [dict(zip(names, combination)) for combination in combinations]
+
+
+def build_sweep_workflow(
+    template: dict, sweep: WorkflowSweep, items: list[dict]
+) -> dict:
+    """
+    Build a single workflow that runs the entrypoint of a workflow template once per item,
+    with `withItems`, instead of submitting one workflow per run.
+    """
+    spec = template.get("spec", {})
+    entrypoint = spec.get("entrypoint")
+    entry_template = next(
+        (t for t in spec.get("templates", []) if t.get("name") == entrypoint), {}
+    )
+    inputs = [
+        param["name"]
+        for param in entry_template.get("inputs", {}).get("parameters", [])
+    ]
+    if missing := [name for name in sweep.grid if name not in inputs]:
+        raise HTTPException(
+            status_code=400,
+            detail=(
+                f"Swept parameters {missing} are not inputs of the "
+                f"entrypoint template '{entrypoint}'."
+            ),
+        )
+
+    # Workflow parameters keep the template defaults, overridden by the shared parameters
+    workflow_parameters = {
+        param["name"]: param.get("value")
+        for param in spec.get("arguments", {}).get("parameters", [])
+    }
+    workflow_parameters |= dict(
+        parameter.split("=", 1)
+        for parameter in parse_parameters(sweep.parameters or [])
+    )
+    run_arguments = [
+        {"name": name, "value": f"{{{{item.{name}}}}}"}
+        if name in sweep.grid
+        else {"name": name, "value": f"{{{{workflow.parameters.{name}}}}}"}
+        for name in inputs
+        if name in sweep.grid or name in workflow_parameters
+    ]
+
+    return {
+        "metadata": {
+            "generateName": f"{sweep.template_name}-sweep-",
+            "labels": {"workflows.argoproj.io/workflow-template": sweep.template_name},
+        },
+        "spec": {field: spec[field] for field in SWEEP_SPEC_FIELDS if field in spec}
+        | {
+            "entrypoint": "sweep",
+            "arguments": {
+                "parameters": [
+                    {"name": name, "value": value}
+                    for name, value in workflow_parameters.items()
+                ]
+            },
+            "templates": [
+                {
+                    "name": "sweep",
+                    "steps": [
+                        [
+                            {
+                                "name": "run",
+                                "templateRef": {
+                                    "name": sweep.template_name,
+                                    "template": entrypoint,
+                                },
+                                "arguments": {"parameters": run_arguments},
+                                "withItems": items,
+                            }
+                        ]
+                    ],
+                }
+            ],
+        }
+        | ({"parallelism": sweep.parallelism} if sweep.parallelism else {}),
+    }
+
+
+@traced("verify_request")
+@timed("auth")
 def verify_request(credentials: HTTPBasicCredentials = Depends(security)) -> bool:
     """
     Verify the request using basic auth.
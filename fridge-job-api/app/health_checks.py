@@ -1,15 +1,18 @@
+import httpx
 import logging
 import os
-import requests
-from fastapi import APIRouter
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import JSONResponse, Response
 from minio import S3Error
+from typing import Annotated
 from urllib3.exceptions import HTTPError
-from .config import ARGO_SERVER, argo_token, minio_client, VERIFY_TLS
+from .config import argo_client, minio_client
+from .instrumentation import TimedRoute
+from .metrics import render
 
 logger = logging.getLogger("fridge.health")
 
-router = APIRouter(tags=["Health"])
+router = APIRouter(tags=["Health"], route_class=TimedRoute)
 
 
 @router.get("/healthz", include_in_schema=False)
@@ -27,7 +30,7 @@ async def readiness() -> dict:
     Readiness probe endpoint.
     Confirms Argo and MinIO are reachable and returns a JSON indicating when ready.
     """
-    checks = {"argo": _check_argo(), "minio": _check_minio()}
+    checks = {"argo": await _check_argo(), "minio": _check_minio()}
     healthy = all(checks[service]["status"] == "ok" for service in checks)
     if not healthy:
         logger.warning("Readiness check failed: %s", checks)
@@ -37,25 +40,31 @@ async def readiness() -> dict:
     )
 
 
-def _check_argo() -> dict:
+@router.get("/metrics", include_in_schema=False)
+async def metrics(accept: Annotated[str | None, Header()] = None) -> Response:
+    """
+    Metrics endpoint in the Prometheus text or OpenMetrics format.
+    """
+    content, media_type = render(accept)
+    return Response(content, media_type=media_type)
+
+
+async def _check_argo() -> dict:
     """
     Check if Argo Workflows is reachable.
     Returns a JSON indicating the status of the Argo service.
     """
     try:
-        response = requests.get(
-            f"{ARGO_SERVER}/api/v1/version",
-            verify=VERIFY_TLS,
-            headers={"Authorization": f"Bearer {argo_token()}"},
-            timeout=3,
-        )
+        response = await argo_client.get("/api/v1/version", timeout=3, retries=0)
         return (
             {"status": "ok"}
             if response.status_code == 200
             else {"status": "unreachable", "error": f"HTTP {response.status_code}"}
         )
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         return {"status": "unreachable", "error": str(e)}
+    except HTTPException as e:
+        return {"status": "unreachable", "error": e.detail}
 
 
 def _check_minio() -> dict:
@@ -0,0 +1,233 @@
+import functools
+import inspect
+import os
+import time
+from collections import defaultdict
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from prometheus_client import Counter, Gauge, Histogram
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Add an X-Upstream-Cost header, with the number of calls to Argo and MinIO and the
+# bytes sent and received, to every response
+DEBUG_HEADERS = os.getenv("DEBUG_HEADERS", "False") == "True"
+
+HTTP_REQUESTS = Counter(
+    "fridge_http_requests_total",
+    "Number of HTTP requests handled, by route and status code",
+    labelnames=("method", "route", "status"),
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "fridge_http_request_duration_seconds",
+    "Time taken to handle HTTP requests, until the end of the response body",
+    labelnames=("method", "route", "status"),
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "fridge_http_requests_in_flight",
+    "Number of HTTP requests being handled",
+)
+UPSTREAM_REQUEST_DURATION = Histogram(
+    "fridge_upstream_request_duration_seconds",
+    "Time taken by requests to upstream services, until the response headers for streams",
+    labelnames=("upstream", "operation"),
+)
+OBJECT_BYTES = Counter(
+    "fridge_object_bytes_total",
+    "Number of bytes of objects uploaded to and downloaded from MinIO",
+    labelnames=("direction",),
+)
+
+
+class MetricsMiddleware:
+    """
+    Records the number, duration and status of HTTP requests, labelled by route
+    template rather than path so that the number of labels stays bounded.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            route = getattr(scope.get("route"), "path", "unmatched")
+            labels = (scope["method"], route, str(status))
+            HTTP_REQUESTS.labels(*labels).inc()
+            HTTP_REQUEST_DURATION.labels(*labels).observe(time.perf_counter() - start)
+
+
+class RequestTiming:
+    """
+    The time spent on each part of handling a request, and the calls made to upstream
+    services, reported in the Server-Timing and X-Upstream-Cost headers.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.durations: dict[str, float] = defaultdict(float)
+        self.endpoint_finished: float | None = None
+        self.upstream_calls = 0
+        self.upstream_bytes = 0
+
+    def server_timing(self) -> str:
+        durations = self.durations | {"total": time.perf_counter() - self.start}
+        return ", ".join(
+            f"{name};dur={seconds * 1000:.1f}" for name, seconds in durations.items()
+        )
+
+    def upstream_cost(self) -> str:
+        return f"calls={self.upstream_calls}, bytes={self.upstream_bytes}"
+
+
+# The timing of the request being handled, if any. Worker threads started for the
+# request get a copy of the context, so they update the same object
+request_timing: ContextVar[RequestTiming | None] = ContextVar(
+    "request_timing", default=None
+)
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    """
+    Add the time taken by the body of a `with` block (or a decorated function) to the
+    Server-Timing header of the current request.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timing := request_timing.get():
+            timing.durations[name] += time.perf_counter() - start
+
+
+@contextmanager
+def upstream_call(upstream: str, operation: str) -> Iterator[None]:
+    """
+    Time a call to an upstream service, for the metrics and the Server-Timing header.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        UPSTREAM_REQUEST_DURATION.labels(upstream, operation).observe(elapsed)
+        if timing := request_timing.get():
+            timing.durations[upstream] += elapsed
+            timing.upstream_calls += 1
+
+
+def count_upstream_bytes(size: int) -> None:
+    """Count bytes sent to or received from an upstream service by the current request."""
+    if timing := request_timing.get():
+        timing.upstream_bytes += size
+
+
+def count_bytes(chunks: Iterable[bytes], direction: str) -> Iterator[bytes]:
+    """Count the bytes of an object as they are streamed."""
+    for chunk in chunks:
+        OBJECT_BYTES.labels(direction).inc(len(chunk))
+        yield chunk
+
+
+class ServerTimingMiddleware:
+    """
+    Adds a Server-Timing header to every response, breaking the time taken to start the
+    response down into authentication, token refresh, calls to Argo and MinIO, and
+    serialisation. With DEBUG_HEADERS, also adds the X-Upstream-Cost header.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timing = RequestTiming()
+        token = request_timing.set(timing)
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", timing.server_timing())
+                if DEBUG_HEADERS:
+                    headers.append("X-Upstream-Cost", timing.upstream_cost())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            request_timing.reset(token)
+
+
+class TimedRoute(APIRoute):
+    """
+    Route that records the time FastAPI spends validating and serialising the value
+    returned by the endpoint, for the Server-Timing header.
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        super().__init__(path, _record_finish(endpoint), **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def timed_handler(request: Request) -> Response:
+            response = await handler(request)
+            timing = request_timing.get()
+            if timing and timing.endpoint_finished:
+                timing.durations["serialize"] += (
+                    time.perf_counter() - timing.endpoint_finished
+                )
+            return response
+
+        return timed_handler
+
+
+def _record_finish(endpoint: Callable) -> Callable:
+    """Wrap an endpoint to record when it returns."""
+
+    def finished() -> None:
+        if timing := request_timing.get():
+            timing.endpoint_finished = time.perf_counter()
+
+    if inspect.iscoroutinefunction(endpoint):
+
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                finished()
+
+    else:
+
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                finished()
+
+    return wrapper
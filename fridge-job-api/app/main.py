@@ -1,7 +1,13 @@
-from fastapi import FastAPI
-from .config import get_version
+import httpx
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from .config import argo_client, argo_log_client, get_version
 from .health_checks import router as health_router
+from .instrumentation import MetricsMiddleware, ServerTimingMiddleware
 from .storage import router as storage_router
+from .tracing import TracingMiddleware, shutdown_tracing
+from .workflow_index import workflow_index
 from .workflows import router as workflows_router
 
 APP_VERSION = get_version()
@@ -18,8 +24,43 @@ and submit workflows based on templates.
 
 """
 
-app = FastAPI(title="FRIDGE API", description=description, version=APP_VERSION)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await argo_client.open()
+    await argo_log_client.open()
+    yield
+    await workflow_index.close()
+    await argo_client.close()
+    await argo_log_client.close()
+    shutdown_tracing()
+
+
+app = FastAPI(
+    title="FRIDGE API",
+    description=description,
+    version=APP_VERSION,
+    lifespan=lifespan,
+)
+
+app.add_middleware(ServerTimingMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware)
 
 app.include_router(workflows_router)
 app.include_router(storage_router)
 app.include_router(health_router)
+
+
+@app.exception_handler(httpx.TimeoutException)
+async def argo_timeout(request: Request, exc: httpx.TimeoutException) -> JSONResponse:
+    return JSONResponse(
+        status_code=504, content={"detail": "Timed out waiting for Argo Workflows."}
+    )
+
+
+@app.exception_handler(httpx.TransportError)
+async def argo_unreachable(request: Request, exc: httpx.TransportError) -> JSONResponse:
+    return JSONResponse(
+        status_code=502, content={"detail": "Unable to connect to Argo Workflows."}
+    )
@@ -0,0 +1,53 @@
+from collections.abc import Callable, Iterator
+from prometheus_client import REGISTRY, disable_created_metrics
+from prometheus_client.exposition import choose_encoder
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, Metric
+from prometheus_client.registry import Collector
+
+# Counters are rendered without the additional _created samples
+disable_created_metrics()
+
+
+class CallbackMetric(Collector):
+    """
+    A gauge or counter computed from a callback each time the metrics are collected.
+    The callback returns the value for each set of label values.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], dict[tuple[str, ...], float]],
+        labelnames: tuple[str, ...] = (),
+        counter: bool = False,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+        self.labelnames = labelnames
+        self.counter = counter
+        REGISTRY.register(self)
+
+    def _family(self) -> Metric:
+        family = CounterMetricFamily if self.counter else GaugeMetricFamily
+        return family(self.name, self.documentation, labels=self.labelnames)
+
+    def describe(self) -> Iterator[Metric]:
+        # Describing the metric means that the callback is not run on registration
+        yield self._family()
+
+    def collect(self) -> Iterator[Metric]:
+        metric = self._family()
+        for labels, value in self.callback().items():
+            metric.add_metric(labels, value)
+        yield metric
+
+
+def render(accept: str | None = None) -> tuple[bytes, str]:
+    """
+    Render all registered metrics in the best format accepted by the scraper, and
+    return them with the content type of that format.
+    """
+    encoder, content_type = choose_encoder(accept or "")
+    return encoder(REGISTRY), content_type
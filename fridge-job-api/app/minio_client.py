@@ -1,16 +1,182 @@
+from collections.abc import Iterator
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
 from fastapi import File, UploadFile, HTTPException
 from fastapi.responses import StreamingResponse
-from io import BytesIO
+from typing import BinaryIO
 from minio import Minio, versioningconfig, commonconfig
-from minio.error import S3Error
+from minio.datatypes import Part
+from minio.error import S3Error, ServerError
+from minio.helpers import MAX_PART_SIZE, MIN_PART_SIZE
 from pathlib import Path
 from threading import Lock
-
+from .instrumentation import (
+    OBJECT_BYTES,
+    count_bytes,
+    count_upstream_bytes,
+    timed,
+    upstream_call,
+)
+from .resilience import BudgetedRetry, CircuitBreaker, RetryBudget
+from .single_flight import SingleFlight
+from .tracing import span, traced
+
+import asyncio
+import contextlib
+import inspect
+import io
 import os
 import ssl
+import re
 import urllib3
 import xml.etree.ElementTree as ET
 
+# A single byte range: "bytes=first-last", "bytes=first-" or "bytes=-suffix_length"
+RANGE_PATTERN = re.compile(r"bytes=(\d*)-(\d*)")
+
+
+def _parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """
+    The first and last byte of an object of `size` bytes requested by a Range header,
+    or None to send the whole object. Multiple ranges and invalid headers are ignored,
+    and ranges that start after the end of the object are rejected with a 416.
+    """
+    match = RANGE_PATTERN.fullmatch(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return None
+    else:
+        start = max(size - int(last), 0)
+        end = size - 1
+    if start >= size or end < start:
+        raise HTTPException(
+            status_code=416,
+            detail="Range Not Satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, end
+
+
+def _if_range_matches(if_range: str | None, stat) -> bool:
+    """
+    Whether the object is unchanged since the version an If-Range header refers to, by
+    strong ETag or by modification date.
+    """
+    if not if_range:
+        return True
+    if if_range.startswith('"'):
+        return if_range == f'"{stat.etag}"'
+    if if_range.startswith("W/") or not stat.last_modified:
+        return False
+    try:
+        return parsedate_to_datetime(if_range) == stat.last_modified.replace(
+            microsecond=0
+        )
+    except (TypeError, ValueError):
+        return False
+
+
+def _read_chunks(response, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+    """Read the body of a MinIO response in chunks, releasing the connection after."""
+    try:
+        yield from response.stream(chunk_size)
+    finally:
+        response.close()
+        response.release_conn()
+
+
+class MultipartUploads:
+    """
+    Multipart uploads to MinIO. The minio package only implements these as private
+    methods of its client, which may change in any release, so they are only called
+    from here and their signatures are checked when the API starts.
+    """
+
+    # The private Minio methods used, and the parameters they are called with
+    METHODS = {
+        "_create_multipart_upload": ("bucket_name", "object_name", "headers"),
+        "_upload_part": (
+            "bucket_name",
+            "object_name",
+            "data",
+            "headers",
+            "upload_id",
+            "part_number",
+        ),
+        "_list_parts": (
+            "bucket_name",
+            "object_name",
+            "upload_id",
+            "part_number_marker",
+        ),
+        "_complete_multipart_upload": (
+            "bucket_name",
+            "object_name",
+            "upload_id",
+            "parts",
+        ),
+        "_abort_multipart_upload": ("bucket_name", "object_name", "upload_id"),
+    }
+
+    def __init__(self, client: Minio):
+        self.client = client
+
+    @classmethod
+    def check(cls) -> None:
+        """Raise an error if the installed minio package lacks any of the methods."""
+        for name, parameters in cls.METHODS.items():
+            method = getattr(Minio, name, None)
+            if method is None or not set(parameters) <= set(
+                inspect.signature(method).parameters
+            ):
+                raise RuntimeError(
+                    f"Minio.{name} is missing or has changed in the installed minio "
+                    "package, so uploads cannot be sent in parts"
+                )
+
+    def create_multipart_upload(self, bucket, object_name, content_type=None) -> str:
+        return self.client._create_multipart_upload(
+            bucket_name=bucket,
+            object_name=object_name,
+            headers={"Content-Type": content_type or "application/octet-stream"},
+        )
+
+    def upload_part(self, bucket, object_name, upload_id, part_number, data) -> str:
+        return self.client._upload_part(
+            bucket_name=bucket,
+            object_name=object_name,
+            data=data,
+            headers=None,
+            upload_id=upload_id,
+            part_number=part_number,
+        )
+
+    def list_parts(self, bucket, object_name, upload_id, part_number_marker=None):
+        return self.client._list_parts(
+            bucket_name=bucket,
+            object_name=object_name,
+            upload_id=upload_id,
+            part_number_marker=part_number_marker,
+        )
+
+    def complete_multipart_upload(self, bucket, object_name, upload_id, parts):
+        return self.client._complete_multipart_upload(
+            bucket_name=bucket,
+            object_name=object_name,
+            upload_id=upload_id,
+            parts=parts,
+        )
+
+    def abort_multipart_upload(self, bucket, object_name, upload_id) -> None:
+        self.client._abort_multipart_upload(
+            bucket_name=bucket, object_name=object_name, upload_id=upload_id
+        )
+
 
 class MinioClient:
     SA_TOKEN_FILE = os.getenv("MINIO_SA_TOKEN_PATH", "/minio/token")
@@ -28,12 +194,41 @@ class MinioClient:
         access_key: str | None = None,
         secret_key: str | None = None,
         secure: bool = False,
+        timeout: urllib3.Timeout = urllib3.Timeout(connect=5, read=60),
+        retries: int = 2,
+        part_size: int = 16 * 1024 * 1024,
+        upload_concurrency: int = 4,
+        presign_max_expiry: int = 3600,
+        breaker: CircuitBreaker | None = None,
+        retry_budget: RetryBudget | None = None,
     ):
         self.endpoint = endpoint
         self.sts_endpoint = sts_endpoint
         self.tenant = tenant
         self.secure = secure
         self.refresh_lock = Lock()
+        self.token_refreshes = 0
+        self.timeout = timeout
+        if not MIN_PART_SIZE <= part_size <= MAX_PART_SIZE:
+            raise ValueError(
+                f"The part size must be between {MIN_PART_SIZE} and {MAX_PART_SIZE} bytes"
+            )
+        self.part_size = part_size
+        self.upload_concurrency = upload_concurrency
+        self.presign_max_expiry = presign_max_expiry
+        MultipartUploads.check()
+        self.breaker = breaker or CircuitBreaker("MinIO")
+        self.retry_budget = retry_budget or RetryBudget()
+        self.flights = SingleFlight("minio")
+        # Only reads are retried, as uploads are streamed and cannot be sent again
+        self.retries = BudgetedRetry(
+            total=retries,
+            backoff_factor=0.2,
+            backoff_max=10,
+            status_forcelist=[500, 502, 503, 504],
+            allowed_methods=["GET", "HEAD"],
+            budget=self.retry_budget,
+        )
 
         retry_count = 0
         st = None  # Default session token to None if not using STS
@@ -67,30 +262,28 @@ class MinioClient:
         ca_bundle = self._get_ca_bundle()
 
         try:
-            if ca_bundle:
-                ssl_context = ssl.create_default_context(cafile=ca_bundle)
-                http_client = urllib3.PoolManager(ssl_context=ssl_context)
-                self.client = Minio(
-                    self.endpoint,
-                    access_key=access_key,
-                    secret_key=secret_key,
-                    session_token=session_token,
-                    secure=self.secure,
-                    http_client=http_client,
-                )
-            else:
-                self.client = Minio(
-                    self.endpoint,
-                    access_key=access_key,
-                    secret_key=secret_key,
-                    session_token=session_token,
-                    secure=self.secure,
-                )
+            http_client = urllib3.PoolManager(
+                timeout=self.timeout,
+                retries=self.retries,
+                ssl_context=(
+                    ssl.create_default_context(cafile=ca_bundle) if ca_bundle else None
+                ),
+            )
+            self.client = Minio(
+                self.endpoint,
+                access_key=access_key,
+                secret_key=secret_key,
+                session_token=session_token,
+                secure=self.secure,
+                http_client=http_client,
+            )
+            self.multipart = MultipartUploads(self.client)
         except Exception as e:
             print(f"Failed to create Minio client: {e}")
             self.client = None
             raise HTTPException(status_code=500, detail="Failed to create Minio client")
 
+    @traced("minio.sts_auth")
     def handle_sts_auth(self):
         """Handle STS authentication with MinIO using Kubernetes service account token."""
 
@@ -100,13 +293,14 @@ class MinioClient:
         ssl_context = ssl.create_default_context(cafile=self.KUBE_CA_CRT)
 
         # Create urllib3 client which accepts kube CA cert
-        http = urllib3.PoolManager(ssl_context=ssl_context)
+        http = urllib3.PoolManager(ssl_context=ssl_context, timeout=self.timeout)
 
         # Send the token to the MinIO STS endpoint
-        response = http.request(
-            "POST",
-            f"{self.sts_endpoint}/sts/{self.tenant}?Action=AssumeRoleWithWebIdentity&Version=2011-06-15&WebIdentityToken={sa_token}",
-        )
+        with upstream_call("sts", "assume_role"):
+            response = http.request(
+                "POST",
+                f"{self.sts_endpoint}/sts/{self.tenant}?Action=AssumeRoleWithWebIdentity&Version=2011-06-15&WebIdentityToken={sa_token}",
+            )
 
         if response.status != 200:
             print(f"STS request failed: {response.status} {response.data.decode()}")
@@ -143,6 +337,7 @@ class MinioClient:
 
                 if access_key and secret_key:
                     self._create_client(access_key, secret_key, session_token)
+                    self.token_refreshes += 1
                     print("Minio client token refreshed successfully")
                 else:
                     print("Failed to refresh Minio client token")
@@ -155,30 +350,60 @@ class MinioClient:
                     status_code=500, detail="Failed to refresh Minio token"
                 )
 
+    @traced("minio.ensure_valid_token")
+    @timed("token")
     def _ensure_valid_token(self):
         """Check if the token needs to be refreshed"""
         if self._token_has_changed():
             self._refresh_token()
 
+    def _call(self, method, *args, **kwargs):
+        """
+        Call a MinIO client method, recording the outcome with the circuit breaker.
+        Error responses from MinIO show that it is up; server errors and failures to get
+        a response do not.
+        """
+        self.retry_budget.deposit()
+        try:
+            with span(f"minio.{method.__name__}"), upstream_call(
+                "minio", method.__name__
+            ):
+                result = method(*args, **kwargs)
+        except S3Error:
+            self.breaker.record_success()
+            raise
+        except (ServerError, urllib3.exceptions.HTTPError, OSError):
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return result
+
     def handle_minio_error(self, error: S3Error):
-        if error._code in ["NoSuchBucket", "NoSuchKey"]:
+        if error.code in ["NoSuchBucket", "NoSuchKey", "NoSuchUpload"]:
             status = 404
-        elif error._code in ["AccessDenied"]:
+        elif error.code in ["AccessDenied"]:
             status = 403
+        elif error.code in ["InvalidPart", "InvalidPartOrder", "EntityTooSmall"]:
+            status = 400
+        elif error.code in ["PreconditionFailed"]:
+            status = 412
         else:
             status = 500
 
         raise HTTPException(status_code=status, detail=error.message)
 
     def create_bucket(self, name, enable_versioning=False):
+        self.breaker.check()
         self._ensure_valid_token()
         try:
-            if not self.client.bucket_exists(name):
-                self.client.make_bucket(name)
+            if not self._call(self.client.bucket_exists, name):
+                self._call(self.client.make_bucket, name)
 
             if enable_versioning:
-                self.client.set_bucket_versioning(
-                    name, versioningconfig.VersioningConfig(commonconfig.ENABLED)
+                self._call(
+                    self.client.set_bucket_versioning,
+                    name,
+                    versioningconfig.VersioningConfig(commonconfig.ENABLED),
                 )
         except S3Error as error:
             self.handle_minio_error(error)
@@ -188,15 +413,11 @@ class MinioClient:
         return {"response": name, "status": 201}
 
     async def put_object(self, bucket, file: UploadFile = File(...)):
+        self.breaker.check()
         self._ensure_valid_token()
         try:
-            content = await file.read()
-            result = self.client.put_object(
-                bucket,
-                file.filename,
-                data=BytesIO(content),
-                length=len(content),
-                content_type=file.content_type,
+            result = await self._put_parts(
+                bucket, file.filename, file.file, file.content_type
             )
         except S3Error as error:
             self.handle_minio_error(error)
@@ -212,30 +433,385 @@ class MinioClient:
             "version": getattr(result, "version_id", "None"),
         }
 
-    def get_object(self, bucket, file_name, target_file=None, version=None):
+    async def _put_parts(self, bucket, file_name, data: BinaryIO, content_type=None):
+        """
+        Stream a spooled upload to MinIO in parts, so that memory use does not grow with
+        the size of the object. Objects smaller than a part are uploaded with a single
+        request, and larger ones as a multipart upload of up to `upload_concurrency`
+        parts at a time.
+
+        A part is only read once there is a free slot to upload it, and bytes are only
+        counted once their part has been uploaded. After a part fails no more parts are
+        read, and the upload is aborted once the parts in flight have finished.
+        """
+        part = await asyncio.to_thread(data.read, self.part_size)
+        if len(part) < self.part_size:
+            result = await asyncio.to_thread(
+                self._call,
+                self.client.put_object,
+                bucket,
+                file_name,
+                io.BytesIO(part),
+                len(part),
+                content_type=content_type or "application/octet-stream",
+            )
+            OBJECT_BYTES.labels("upload").inc(len(part))
+            count_upstream_bytes(len(part))
+            return result
+
+        upload_id = await asyncio.to_thread(
+            self._call,
+            self.multipart.create_multipart_upload,
+            bucket,
+            file_name,
+            content_type,
+        )
+        slots = asyncio.Semaphore(self.upload_concurrency)
+        parts: list[Part] = []
+        errors: list[Exception] = []
+
+        async def upload_part(part_number: int, part: bytes) -> None:
+            try:
+                etag = await asyncio.to_thread(
+                    self._call,
+                    self.multipart.upload_part,
+                    bucket,
+                    file_name,
+                    upload_id,
+                    part_number,
+                    part,
+                )
+            except Exception as error:
+                errors.append(error)
+                raise
+            finally:
+                slots.release()
+            parts.append(Part(part_number, etag))
+            OBJECT_BYTES.labels("upload").inc(len(part))
+            count_upstream_bytes(len(part))
+
+        tasks: list[asyncio.Task] = []
+        try:
+            while part:
+                await slots.acquire()
+                if errors:
+                    raise errors[0]
+                tasks.append(asyncio.create_task(upload_part(len(tasks) + 1, part)))
+                part = await asyncio.to_thread(data.read, self.part_size)
+            await asyncio.gather(*tasks)
+            return await asyncio.to_thread(
+                self._call,
+                self.multipart.complete_multipart_upload,
+                bucket,
+                file_name,
+                upload_id,
+                sorted(parts, key=lambda part: part.part_number),
+            )
+        except BaseException:
+            # Parts still being uploaded in worker threads cannot be cancelled, so wait
+            # for them before aborting, or they could be left behind in MinIO
+            await asyncio.gather(*tasks, return_exceptions=True)
+            with contextlib.suppress(Exception):
+                await asyncio.to_thread(
+                    self._call,
+                    self.multipart.abort_multipart_upload,
+                    bucket,
+                    file_name,
+                    upload_id,
+                )
+            raise
+
+    async def create_upload(self, bucket, file_name, content_type=None):
+        """
+        Start an upload session: a MinIO multipart upload, which parts can be uploaded
+        to separately, in any order and retried, before it is completed or aborted.
+        """
+        self.breaker.check()
+        self._ensure_valid_token()
+        try:
+            upload_id = await asyncio.to_thread(
+                self._call,
+                self.multipart.create_multipart_upload,
+                bucket,
+                file_name,
+                content_type,
+            )
+        except S3Error as error:
+            self.handle_minio_error(error)
+        except Exception as error:
+            raise HTTPException(
+                status_code=500, detail=f"Unable to start upload: {error}"
+            )
+
+        return {"status": 201, "upload_id": upload_id, "part_size": self.part_size}
+
+    async def upload_part(self, bucket, file_name, upload_id, part_number, data: bytes):
+        self.breaker.check()
+        self._ensure_valid_token()
+        try:
+            etag = await asyncio.to_thread(
+                self._call,
+                self.multipart.upload_part,
+                bucket,
+                file_name,
+                upload_id,
+                part_number,
+                data,
+            )
+            OBJECT_BYTES.labels("upload").inc(len(data))
+            count_upstream_bytes(len(data))
+        except S3Error as error:
+            self.handle_minio_error(error)
+        except Exception as error:
+            raise HTTPException(
+                status_code=500, detail=f"Unable to upload part: {error}"
+            )
+
+        return {"status": 200, "part_number": part_number, "etag": etag}
+
+    def _list_parts(self, bucket, file_name, upload_id) -> list[Part]:
+        """List all the parts uploaded to a multipart upload, a page at a time."""
+        parts = []
+        marker = None
+        while True:
+            result = self._call(
+                self.multipart.list_parts,
+                bucket,
+                file_name,
+                upload_id,
+                part_number_marker=marker,
+            )
+            parts.extend(result.parts)
+            if not result.is_truncated:
+                return parts
+            marker = result.next_part_number_marker
+
+    async def list_parts(self, bucket, file_name, upload_id):
+        self.breaker.check()
+        self._ensure_valid_token()
+        try:
+            parts = await asyncio.to_thread(
+                self._list_parts, bucket, file_name, upload_id
+            )
+        except S3Error as error:
+            self.handle_minio_error(error)
+        except Exception as error:
+            raise HTTPException(
+                status_code=500, detail=f"Unable to list uploaded parts: {error}"
+            )
+
+        return {
+            "status": 200,
+            "upload_id": upload_id,
+            "parts": [
+                {"part_number": part.part_number, "etag": part.etag, "size": part.size}
+                for part in parts
+            ],
+        }
+
+    async def complete_upload(self, bucket, file_name, upload_id):
+        """Complete an upload session from all the parts uploaded to it."""
+        self.breaker.check()
+        self._ensure_valid_token()
+        try:
+            parts = await asyncio.to_thread(
+                self._list_parts, bucket, file_name, upload_id
+            )
+            if not parts:
+                raise HTTPException(
+                    status_code=400, detail="No parts have been uploaded"
+                )
+            result = await asyncio.to_thread(
+                self._call,
+                self.multipart.complete_multipart_upload,
+                bucket,
+                file_name,
+                upload_id,
+                [Part(part.part_number, part.etag) for part in parts],
+            )
+        except S3Error as error:
+            self.handle_minio_error(error)
+        except HTTPException:
+            raise
+        except Exception as error:
+            raise HTTPException(
+                status_code=500, detail=f"Unable to complete upload: {error}"
+            )
+
+        return {
+            "status": 201,
+            "response": result.location,
+            "version": result.version_id,
+        }
+
+    async def abort_upload(self, bucket, file_name, upload_id):
+        self.breaker.check()
+        self._ensure_valid_token()
+        try:
+            await asyncio.to_thread(
+                self._call,
+                self.multipart.abort_multipart_upload,
+                bucket,
+                file_name,
+                upload_id,
+            )
+        except S3Error as error:
+            self.handle_minio_error(error)
+        except Exception as error:
+            raise HTTPException(
+                status_code=500, detail=f"Unable to abort upload: {error}"
+            )
+
+        return {"status": 200, "response": upload_id}
+
+    async def presign(
+        self,
+        bucket,
+        file_name,
+        method="GET",
+        expires=900,
+        version=None,
+        upload_id=None,
+        part_number=None,
+    ):
+        """
+        Create a time-limited URL to download or upload an object, or a part of an
+        upload session, directly from or to MinIO.
+        """
+        if not 1 <= expires <= self.presign_max_expiry:
+            raise HTTPException(
+                status_code=400,
+                detail=f"expires must be between 1 and {self.presign_max_expiry} seconds",
+            )
+        if (upload_id is None) != (part_number is None):
+            raise HTTPException(
+                status_code=400,
+                detail="upload_id and part_number must be given together",
+            )
+        if upload_id is not None and method != "PUT":
+            raise HTTPException(
+                status_code=400, detail="Parts can only be presigned for PUT"
+            )
+
+        self.breaker.check()
+        self._ensure_valid_token()
+        try:
+            url = await asyncio.to_thread(
+                self._call,
+                self.client.get_presigned_url,
+                method,
+                bucket,
+                file_name,
+                expires=timedelta(seconds=expires),
+                version_id=version,
+                extra_query_params=(
+                    {"uploadId": upload_id, "partNumber": str(part_number)}
+                    if upload_id is not None
+                    else None
+                ),
+            )
+        except S3Error as error:
+            self.handle_minio_error(error)
+        except Exception as error:
+            raise HTTPException(
+                status_code=500, detail=f"Unable to presign URL: {error}"
+            )
+
+        print(f"Presigned {method} URL for {bucket}/{file_name} for {expires}s")
+        return {
+            "status": 200,
+            "method": method,
+            "url": url,
+            "expires_at": datetime.now(timezone.utc) + timedelta(seconds=expires),
+        }
+
+    async def get_object(
+        self,
+        bucket,
+        file_name,
+        target_file=None,
+        version=None,
+        range_header=None,
+        if_range=None,
+    ):
+        """
+        Stream an object, or the byte range of it requested with a Range header (unless
+        an If-Range header shows that the client has a different version of the object).
+        """
+        self.breaker.check()
         self._ensure_valid_token()
         if not target_file:
             target_file = file_name
         try:
-            result = self.client.get_object(bucket, file_name, target_file, version)
+            stat = await self.stat_object(bucket, file_name, version)
+            headers = {
+                "Content-Disposition": f'attachment; filename="{target_file}"',
+                "Accept-Ranges": "bytes",
+                "ETag": f'"{stat.etag}"',
+            }
+            if stat.last_modified:
+                headers["Last-Modified"] = format_datetime(
+                    stat.last_modified, usegmt=True
+                )
+
+            byte_range = None
+            if range_header and _if_range_matches(if_range, stat):
+                byte_range = _parse_range(range_header, stat.size)
+            if byte_range:
+                start, end = byte_range
+                headers["Content-Range"] = f"bytes {start}-{end}/{stat.size}"
+            else:
+                start, end = 0, stat.size - 1
+            headers["Content-Length"] = str(end - start + 1)
+
+            # If-Match makes sure that every range is read from the same version of
+            # the object, even if it is replaced during a download
+            result = await asyncio.to_thread(
+                self._call,
+                self.client.get_object,
+                bucket,
+                file_name,
+                offset=start,
+                length=end - start + 1 if byte_range else 0,
+                request_headers={"If-Match": f'"{stat.etag}"'},
+                version_id=version,
+            )
             return StreamingResponse(
-                result,
+                count_bytes(_read_chunks(result), "download"),
+                status_code=206 if byte_range else 200,
                 media_type="application/octet-stream",
-                headers={
-                    "Content-Disposition": f'attachment; filename="{target_file}"'
-                },
+                headers=headers,
             )
         except S3Error as error:
             self.handle_minio_error(error)
+        except HTTPException:
+            raise
         except Exception as error:
             raise HTTPException(
                 status_code=500, detail=f"Unable to get object from bucket: {error}"
             )
 
-    def check_object_exists(self, bucket, file_name, version=None):
+    async def stat_object(self, bucket, file_name, version=None):
+        """
+        Get the metadata of an object, in a worker thread. Identical requests made while
+        one is already in flight share its result.
+        """
+        return await self.flights.do(
+            (bucket, file_name, version),
+            lambda: asyncio.to_thread(
+                self._call,
+                self.client.stat_object,
+                bucket,
+                file_name,
+                version_id=version,
+            ),
+        )
+
+    async def check_object_exists(self, bucket, file_name, version=None):
+        self.breaker.check()
         self._ensure_valid_token()
         try:
-            self.client.stat_object(bucket, file_name, version_id=version)
+            await self.stat_object(bucket, file_name, version)
             return True
         # Raise not-found error to be caught and returned by upstream function
         except S3Error as error:
@@ -244,12 +820,19 @@ class MinioClient:
         except Exception as error:
             return False
 
-    def delete_object(self, bucket, file_name, version=None):
+    async def delete_object(self, bucket, file_name, version=None):
+        self.breaker.check()
         self._ensure_valid_token()
         try:
             # Check that the object exists in the bucket before deleting
-            if self.check_object_exists(bucket, file_name, version):
-                self.client.remove_object(bucket, file_name, version_id=version)
+            if await self.check_object_exists(bucket, file_name, version):
+                await asyncio.to_thread(
+                    self._call,
+                    self.client.remove_object,
+                    bucket,
+                    file_name,
+                    version_id=version,
+                )
             else:
                 return {
                     "status": 404,
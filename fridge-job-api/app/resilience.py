@@ -0,0 +1,132 @@
+import math
+import threading
+import time
+import urllib3
+from fastapi import HTTPException
+from urllib3.exceptions import MaxRetryError, ResponseError
+from .metrics import CallbackMetric
+
+
+class CircuitBreaker:
+    """
+    Fails requests to an upstream service fast while it is unhealthy.
+
+    After `failure_threshold` consecutive failures the breaker opens and requests are
+    rejected with a 503 for `reset_timeout` seconds. A single request is then let through
+    as a probe (half open) while other requests are still rejected: success closes the
+    breaker, and failure opens it again. If the probe has not finished within
+    `reset_timeout` seconds, another request is let through in its place.
+    """
+
+    # Values of the state metric
+    CLOSED = 0
+    HALF_OPEN = 1
+    OPEN = 2
+
+    def __init__(
+        self, name: str, failure_threshold: int = 5, reset_timeout: float = 30
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_started_at = 0.0
+        # Outcomes of MinIO requests are recorded from worker threads
+        self.lock = threading.Lock()
+        BREAKERS.append(self)
+
+    def check(self) -> None:
+        """
+        Raise a 503 if the breaker is open, or half open with a probe still in flight.
+        """
+        with self.lock:
+            if self.state == self.CLOSED:
+                return
+            now = time.monotonic()
+            if self.state == self.OPEN:
+                remaining = self.opened_at + self.reset_timeout - now
+                retry_after = math.ceil(remaining)
+            else:
+                # The probe in flight may close the breaker again at any moment
+                remaining = self.probe_started_at + self.reset_timeout - now
+                retry_after = 1
+            if remaining <= 0:
+                self.state = self.HALF_OPEN
+                self.probe_started_at = now
+                return
+        raise HTTPException(
+            status_code=503,
+            detail=f"{self.name} is unavailable, please try again later.",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+    def record_success(self) -> None:
+        with self.lock:
+            self.failures = 0
+            self.state = self.CLOSED
+
+    def record_failure(self) -> None:
+        with self.lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class RetryBudget:
+    """
+    Limits retries to a fraction of requests, so that retries cannot multiply the load
+    on an upstream service that is already struggling.
+
+    Every request adds `ratio` of a token and every retry spends a whole token, with at
+    most `capacity` tokens saved up for bursts.
+    """
+
+    def __init__(self, ratio: float = 0.2, capacity: float = 10):
+        self.ratio = ratio
+        self.capacity = capacity
+        self.tokens = capacity
+
+    def deposit(self) -> None:
+        self.tokens = min(self.capacity, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class BudgetedRetry(urllib3.Retry):
+    """
+    urllib3 retries for the MinIO client, which also spend from a retry budget.
+    """
+
+    def __init__(self, *args, budget: RetryBudget | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.budget = budget
+
+    def new(self, **kwargs) -> "BudgetedRetry":
+        return super().new(budget=self.budget, **kwargs)
+
+    def increment(self, method=None, url=None, response=None, error=None, **kwargs):
+        retry = super().increment(method, url, response, error, **kwargs)
+        if self.budget is not None and not self.budget.withdraw():
+            raise MaxRetryError(
+                kwargs.get("_pool"),
+                url,
+                error or ResponseError("retry budget exhausted"),
+            )
+        return retry
+
+
+BREAKERS: list[CircuitBreaker] = []
+
+CallbackMetric(
+    "fridge_upstream_circuit_state",
+    "State of the circuit breaker for each upstream service (0 closed, 1 half open, 2 open)",
+    labelnames=("upstream",),
+    callback=lambda: {(breaker.name,): breaker.state for breaker in BREAKERS},
+)
@@ -0,0 +1,48 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import TypeVar
+from prometheus_client import Counter
+
+T = TypeVar("T")
+
+SINGLE_FLIGHT_CALLS = Counter(
+    "fridge_single_flight_calls_total",
+    "Number of calls to an upstream service that could be coalesced",
+    labelnames=("upstream",),
+)
+SINGLE_FLIGHT_SHARED = Counter(
+    "fridge_single_flight_shared_total",
+    "Number of calls that shared the result of an identical call already in flight",
+    labelnames=("upstream",),
+)
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls to an upstream service. While a call for a key
+    is in flight, callers asking for the same key wait for it and share its result (or
+    exception) instead of making their own call.
+    """
+
+    def __init__(self, upstream: str):
+        self.upstream = upstream
+        self.calls: dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        SINGLE_FLIGHT_CALLS.labels(self.upstream).inc()
+        future = self.calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(call())
+            self.calls[key] = future
+            future.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            SINGLE_FLIGHT_SHARED.labels(self.upstream).inc()
+        # A caller that goes away does not cancel the call for the others
+        return await asyncio.shield(future)
+
+    def _finish(self, key: Hashable, future: asyncio.Future) -> None:
+        if self.calls.get(key) is future:
+            del self.calls[key]
+        # Mark the exception as retrieved, in case every caller has gone away
+        if not future.cancelled():
+            future.exception()
@@ -1,17 +1,26 @@
-import json
-import requests
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    Header,
+    HTTPException,
+    Path,
+    Query,
+    Request,
+    UploadFile,
+)
 from typing import Annotated, Literal
 from .config import (
-    argo_token,
-    ARGO_SERVER,
+    MINIO_MAX_PART_SIZE,
+    argo_client,
     minio_client,
     parse_argo_error,
     verify_request,
-    VERIFY_TLS,
 )
+from .admission import admission
+from .instrumentation import TimedRoute
 
-router = APIRouter(tags=["s3"])
+router = APIRouter(tags=["s3"], route_class=TimedRoute)
 
 
 @router.post("/object/{bucket}/upload", tags=["s3"])
@@ -25,17 +34,168 @@ async def upload_object(
     return await minio_client.put_object(bucket, file)
 
 
+@router.post("/object/{bucket}/{file_name}/presign", tags=["s3"])
+async def presign_object(
+    bucket: str,
+    file_name: str,
+    method: Literal["GET", "PUT"] = "GET",
+    expires: Annotated[
+        int, Query(ge=1, description="Number of seconds the URL is valid for")
+    ] = 900,
+    version: str | None = None,
+    upload_id: Annotated[
+        str | None, Query(description="Upload session to presign a part of")
+    ] = None,
+    part_number: Annotated[
+        int | None, Query(ge=1, le=10000, description="Part of the upload session")
+    ] = None,
+    verified: Annotated[bool, "Verify the request with basic auth"] = Depends(
+        verify_request
+    ),
+):
+    """
+    Get a time-limited URL to download (GET) or upload (PUT) an object directly from or
+    to MinIO, so that large transfers do not pass through the API. With `upload_id`
+    and `part_number`, get a PUT URL for one part of a resumable upload.
+    """
+    return await minio_client.presign(
+        bucket, file_name, method, expires, version, upload_id, part_number
+    )
+
+
+@router.post("/object/{bucket}/{file_name}/uploads", tags=["s3"])
+async def create_upload(
+    bucket: str,
+    file_name: str,
+    content_type: str | None = None,
+    verified: Annotated[bool, "Verify the request with basic auth"] = Depends(
+        verify_request
+    ),
+):
+    """
+    Start a resumable upload of a large file. Upload the file in parts of at least
+    5 MiB (except the last), which can be sent in parallel and retried separately, then
+    complete the upload to assemble the object. Returns the upload ID and the
+    recommended part size.
+    """
+    return await minio_client.create_upload(bucket, file_name, content_type)
+
+
+@router.put(
+    "/object/{bucket}/{file_name}/uploads/{upload_id}/{part_number}", tags=["s3"]
+)
+async def upload_part(
+    bucket: str,
+    file_name: str,
+    upload_id: str,
+    part_number: Annotated[
+        int, Path(ge=1, le=10000, description="Position of the part in the file")
+    ],
+    request: Request,
+    verified: Annotated[bool, "Verify the request with basic auth"] = Depends(
+        verify_request
+    ),
+):
+    """
+    Upload one part of a resumable upload, sent as the raw request body. Uploading a
+    part number again replaces it. Parts can be at most MINIO_MAX_PART_SIZE bytes.
+    """
+    return await minio_client.upload_part(
+        bucket, file_name, upload_id, part_number, await _read_part(request)
+    )
+
+
+async def _read_part(request: Request) -> bytes:
+    """
+    Read the body of a part upload, rejecting it with a 413 as soon as it is known to
+    be over the maximum part size.
+    """
+    too_large = HTTPException(
+        status_code=413,
+        detail=f"Parts can be at most {MINIO_MAX_PART_SIZE} bytes",
+    )
+    length = request.headers.get("content-length", "")
+    if length.isdigit() and int(length) > MINIO_MAX_PART_SIZE:
+        raise too_large
+
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > MINIO_MAX_PART_SIZE:
+            raise too_large
+    return bytes(body)
+
+
+@router.get("/object/{bucket}/{file_name}/uploads/{upload_id}", tags=["s3"])
+async def list_upload_parts(
+    bucket: str,
+    file_name: str,
+    upload_id: str,
+    verified: Annotated[bool, "Verify the request with basic auth"] = Depends(
+        verify_request
+    ),
+):
+    """
+    List the parts uploaded so far, to find which parts to send when resuming.
+    """
+    return await minio_client.list_parts(bucket, file_name, upload_id)
+
+
+@router.post("/object/{bucket}/{file_name}/uploads/{upload_id}/complete", tags=["s3"])
+async def complete_upload(
+    bucket: str,
+    file_name: str,
+    upload_id: str,
+    verified: Annotated[bool, "Verify the request with basic auth"] = Depends(
+        verify_request
+    ),
+):
+    """
+    Assemble the uploaded parts, in order of part number, into the object.
+    """
+    return await minio_client.complete_upload(bucket, file_name, upload_id)
+
+
+@router.delete("/object/{bucket}/{file_name}/uploads/{upload_id}", tags=["s3"])
+async def abort_upload(
+    bucket: str,
+    file_name: str,
+    upload_id: str,
+    verified: Annotated[bool, "Verify the request with basic auth"] = Depends(
+        verify_request
+    ),
+):
+    """
+    Abort a resumable upload and discard the parts uploaded to it.
+    """
+    return await minio_client.abort_upload(bucket, file_name, upload_id)
+
+
 @router.get("/object/{bucket}/{file_name}", tags=["s3"])
 async def get_object(
     bucket: str,
     file_name: str,
     target_file: str | None = None,
     version: str | None = None,
+    range_header: Annotated[
+        str | None,
+        Header(alias="Range", description="Byte range to get, e.g. bytes=0-1023"),
+    ] = None,
+    if_range: Annotated[
+        str | None,
+        Header(description="Only get the range if the object has this ETag or date"),
+    ] = None,
     verified: Annotated[bool, "Verify the request with basic auth"] = Depends(
         verify_request
     ),
 ):
-    return minio_client.get_object(bucket, file_name, target_file, version)
+    """
+    Download an object. A single byte range can be requested with a Range header, to
+    resume a download or download parts of an object in parallel.
+    """
+    return await minio_client.get_object(
+        bucket, file_name, target_file, version, range_header, if_range
+    )
 
 
 # Trigger Argo workflow
@@ -50,12 +210,10 @@ async def move_object(
         verify_request
     ),
 ) -> dict:
-    r = requests.post(
-        f"{ARGO_SERVER}/api/v1/workflows/argo-workflows/submit",
-        verify=VERIFY_TLS,
-        headers={"Authorization": f"Bearer {argo_token()}"},
-        data=json.dumps(
-            {
+    async with admission.admit("argo-workflows") as admitted:
+        r = await argo_client.post(
+            "/api/v1/workflows/argo-workflows/submit",
+            json={
                 "resourceKind": "WorkflowTemplate",
                 "resourceName": "data-copy",
                 "submitOptions": {
@@ -65,9 +223,9 @@ async def move_object(
                         f"files={files}",
                     ],
                 },
-            }
-        ),
-    )
+            },
+        )
+        admitted.accepted = r.status_code == 200
 
     if r.status_code != 200:
         raise HTTPException(
@@ -101,4 +259,4 @@ async def delete_object(
         verify_request
     ),
 ):
-    return minio_client.delete_object(bucket, file_name, version)
+    return await minio_client.delete_object(bucket, file_name, version)
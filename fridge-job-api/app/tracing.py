@@ -0,0 +1,142 @@
+import functools
+import logging
+import os
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# OpenTelemetry is optional: without it, or with TRACING_EXPORTER=none, spans are no-ops
+try:
+    from opentelemetry import propagate, trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+except ImportError:
+    trace = None
+
+logger = logging.getLogger("fridge.tracing")
+
+# Where spans are exported to: "none", "console", "file" (one JSON span per line in
+# TRACING_FILE), or "otlp" (configured with the standard OTEL_EXPORTER_OTLP_* variables)
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none")
+TRACING_FILE = os.getenv("TRACING_FILE", "traces.jsonl")
+
+
+def _create_provider(exporter_name: str) -> "TracerProvider | None":
+    if exporter_name == "none":
+        return None
+    if trace is None:
+        logger.warning(
+            "TRACING_EXPORTER is %s but OpenTelemetry is not installed, tracing is disabled",
+            exporter_name,
+        )
+        return None
+
+    match exporter_name:
+        case "console":
+            exporter = ConsoleSpanExporter()
+        case "file":
+            exporter = ConsoleSpanExporter(
+                out=open(TRACING_FILE, "a"),
+                formatter=lambda span: span.to_json(indent=None) + "\n",
+            )
+        case "otlp":
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+                OTLPSpanExporter,
+            )
+
+            exporter = OTLPSpanExporter()
+        case _:
+            raise ValueError(f"Unknown TRACING_EXPORTER: {exporter_name}")
+
+    provider = TracerProvider(
+        resource=Resource.create(
+            {"service.name": os.getenv("OTEL_SERVICE_NAME", "fridge-api")}
+        )
+    )
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    return provider
+
+
+_provider = _create_provider(TRACING_EXPORTER)
+_tracer = _provider.get_tracer("fridge-api") if _provider else None
+
+
+def shutdown_tracing() -> None:
+    """Export any spans that are still buffered. Called on application shutdown."""
+    if _provider is not None:
+        _provider.shutdown()
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[None]:
+    """Trace the body of a `with` block as a span, if tracing is enabled."""
+    if _tracer is None:
+        yield
+        return
+    with _tracer.start_as_current_span(name, attributes=attributes):
+        yield
+
+
+def traced(name: str) -> Callable:
+    """Decorator to trace every call of a (synchronous) function as a span."""
+
+    def decorator(function: Callable) -> Callable:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def trace_headers() -> dict:
+    """Headers carrying the current trace context to an upstream service."""
+    headers = {}
+    if _tracer is not None:
+        propagate.inject(headers)
+    return headers
+
+
+class TracingMiddleware:
+    """
+    Traces each HTTP request as a server span, continuing the trace of the caller if
+    the request carries trace context headers.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if _tracer is None or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = {
+            key.decode("latin-1"): value.decode("latin-1")
+            for key, value in scope["headers"]
+        }
+        method = scope["method"]
+        with _tracer.start_as_current_span(
+            method,
+            context=propagate.extract(headers),
+            kind=trace.SpanKind.SERVER,
+            attributes={"http.request.method": method, "url.path": scope["path"]},
+        ) as server_span:
+
+            async def send_with_status(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    server_span.set_attribute(
+                        "http.response.status_code", message["status"]
+                    )
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                # The route is only known once the request has been routed
+                if route := getattr(scope.get("route"), "path", None):
+                    server_span.update_name(f"{method} {route}")
+                    server_span.set_attribute("http.route", route)
@@ -0,0 +1,401 @@
+import asyncio
+import contextvars
+import httpx
+import json
+import logging
+import time
+from collections import defaultdict
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from fastapi import HTTPException
+from .argo_client import ArgoClient
+from .config import (
+    ARGO_LIST_PAGE_SIZE,
+    WORKFLOW_FIELDS,
+    WORKFLOW_GET_FIELDS,
+    WORKFLOW_INDEX_ENABLED,
+    WORKFLOW_INDEX_MAX_STALENESS,
+    WORKFLOW_LIST_FIELDS,
+    Workflow,
+    argo_client,
+    extract_argo_workflow,
+    parse_argo_error,
+)
+from .metrics import CallbackMetric
+from .tracing import span
+
+logger = logging.getLogger("fridge.workflow_index")
+
+# Fields requested on the watch stream, matching those kept in the index
+WATCH_FIELDS = ",".join(
+    ["result.type", "result.object.metadata.resourceVersion"]
+    + [f"result.object.{field}" for field in WORKFLOW_FIELDS]
+)
+
+# Delay between attempts to re-establish a failed watch, and before re-establishing a
+# watch that ended normally
+WATCH_RETRY_SECONDS = 5
+WATCH_RECONNECT_SECONDS = 1
+
+# Argo ends each watch after this many seconds, so that it is re-established before the
+# index is considered out of sync. With no event, bookmark or end of the watch for
+# twice as long, the connection is assumed to be broken
+WATCH_TIMEOUT_SECONDS = max(int(WORKFLOW_INDEX_MAX_STALENESS / 2), 1)
+
+
+class ResourceVersionExpired(Exception):
+    """The watch resource version is too old and the index must be listed again."""
+
+
+class WorkflowInformer:
+    """
+    In-memory index of the workflows in a namespace.
+
+    The index is filled with a list call to Argo and then kept up to date with Argo's
+    workflow watch API, so that reads do not need a request to Argo.
+    """
+
+    def __init__(self, client: ArgoClient, namespace: str):
+        self.client = client
+        self.namespace = namespace
+        self.workflows: dict[str, Workflow] = {}
+        self.by_phase: dict[str | None, set[str]] = defaultdict(set)
+        self.resource_version: str | None = None
+        # The last time the index was known to match Argo: when it was listed, and when
+        # the watch was established, received an event or bookmark, or ended normally
+        self.synced_at = 0.0
+        self._task: asyncio.Task | None = None
+        # Queues of clients waiting for changes to a workflow, by workflow name
+        self._subscribers: dict[str, set[asyncio.Queue]] = defaultdict(set)
+
+    async def start(self) -> None:
+        """
+        List the workflows and start watching for changes.
+        Errors from the initial list are raised to the caller.
+        """
+        await self._list()
+        # The watch outlives the request that started it, so it runs in a new context
+        # rather than in the request's trace and timing
+        self._task = asyncio.create_task(self._run(), context=contextvars.Context())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def staleness(self) -> float:
+        """
+        Seconds since the index was last known to match Argo.
+        """
+        return time.monotonic() - self.synced_at
+
+    def list(self) -> list[Workflow]:
+        return sorted(
+            self.workflows.values(),
+            key=lambda workflow: workflow.created_at or "",
+            reverse=True,
+        )
+
+    def get(self, name: str) -> Workflow | None:
+        return self.workflows.get(name)
+
+    @contextmanager
+    def subscribe(self, name: str) -> Iterator[asyncio.Queue]:
+        """
+        Receive every change to a workflow on a queue, with None when it is deleted.
+        """
+        queue = asyncio.Queue()
+        self._subscribers[name].add(queue)
+        try:
+            yield queue
+        finally:
+            self._subscribers[name].discard(queue)
+            if not self._subscribers[name]:
+                del self._subscribers[name]
+
+    def _notify(self, name: str, workflow: Workflow | None) -> None:
+        for queue in self._subscribers.get(name, ()):
+            queue.put_nowait(workflow)
+
+    def _set(self, workflow: Workflow) -> None:
+        previous = self.workflows.get(workflow.name)
+        if previous is not None:
+            self.by_phase[previous.status].discard(previous.name)
+        self.workflows[workflow.name] = workflow
+        self.by_phase[workflow.status].add(workflow.name)
+        self._notify(workflow.name, workflow)
+
+    def _delete(self, name: str) -> None:
+        previous = self.workflows.pop(name, None)
+        if previous is not None:
+            self.by_phase[previous.status].discard(name)
+        self._notify(name, None)
+
+    async def _list(self) -> None:
+        """Replace the index with a full, paginated list of workflows from Argo."""
+        path = f"/api/v1/workflows/{self.namespace}"
+        params = {
+            "listOptions.limit": ARGO_LIST_PAGE_SIZE,
+            "fields": WORKFLOW_LIST_FIELDS,
+        }
+        workflows = []
+        next_token = None
+        while True:
+            page_params = params | (
+                {"listOptions.continue": next_token} if next_token else {}
+            )
+            r = await self.client.get(path, params=page_params)
+            if r.status_code != 200:
+                raise HTTPException(
+                    status_code=r.status_code, detail=parse_argo_error(r.json())
+                )
+            page = r.json()
+            workflows.extend(
+                extract_argo_workflow(item) for item in page.get("items") or []
+            )
+            next_token = page.get("metadata", {}).get("continue")
+            if not next_token:
+                break
+
+        self.workflows = {}
+        self.by_phase = defaultdict(set)
+        for workflow in workflows:
+            self._set(workflow)
+        for name in self._subscribers.keys() - self.workflows.keys():
+            self._notify(name, None)
+        self.resource_version = page.get("metadata", {}).get("resourceVersion")
+        self.synced_at = time.monotonic()
+        logger.info(
+            "Listed %d workflows in %s at resource version %s",
+            len(self.workflows),
+            self.namespace,
+            self.resource_version,
+        )
+
+    async def _run(self) -> None:
+        """Keep the watch open, listing again when the resource version expires."""
+        while True:
+            started = time.monotonic()
+            try:
+                with span("workflow_index.watch", namespace=self.namespace):
+                    await self._watch()
+                # Watches end normally at their timeout. One that ends sooner may be
+                # ended by a proxy or an overloaded server, so wait longer
+                if time.monotonic() - started < WATCH_TIMEOUT_SECONDS / 2:
+                    await asyncio.sleep(WATCH_RETRY_SECONDS)
+                else:
+                    await asyncio.sleep(WATCH_RECONNECT_SECONDS)
+            except ResourceVersionExpired:
+                logger.info(
+                    "Resource version expired in %s, listing again", self.namespace
+                )
+                await self._relist()
+            except (httpx.HTTPError, HTTPException, ValueError) as e:
+                logger.warning("Workflow watch failed in %s: %r", self.namespace, e)
+                await asyncio.sleep(WATCH_RETRY_SECONDS)
+
+    async def _relist(self) -> None:
+        while True:
+            try:
+                with span("workflow_index.list", namespace=self.namespace):
+                    await self._list()
+                return
+            except (httpx.HTTPError, HTTPException, ValueError) as e:
+                logger.warning("Workflow list failed in %s: %s", self.namespace, e)
+                await asyncio.sleep(WATCH_RETRY_SECONDS)
+
+    def _watch_params(self) -> dict:
+        return {
+            "fields": WATCH_FIELDS,
+            "listOptions.timeoutSeconds": WATCH_TIMEOUT_SECONDS,
+            "listOptions.allowWatchBookmarks": "true",
+        }
+
+    async def _watch(self) -> None:
+        params = self._watch_params()
+        if self.resource_version:
+            params["listOptions.resourceVersion"] = self.resource_version
+        r = await self.client.stream(
+            f"/api/v1/workflow-events/{self.namespace}",
+            params=params,
+            timeout=httpx.Timeout(
+                None,
+                connect=self.client.timeout.connect,
+                read=2 * WATCH_TIMEOUT_SECONDS,
+            ),
+        )
+        try:
+            if r.status_code == 410:
+                raise ResourceVersionExpired()
+            if r.status_code != 200:
+                await r.aread()
+                raise HTTPException(
+                    status_code=r.status_code, detail=parse_argo_error(r.json())
+                )
+            self.synced_at = time.monotonic()
+            async for line in r.aiter_lines():
+                if line:
+                    self._handle_event(json.loads(line))
+                    self.synced_at = time.monotonic()
+            # Argo has sent every change up to the end of the watch
+            self.synced_at = time.monotonic()
+        finally:
+            await r.aclose()
+
+    def _handle_event(self, message: dict) -> None:
+        if "error" in message:
+            error = message["error"]
+            if error.get("http_code") == 410 or "too old" in error.get("message", ""):
+                raise ResourceVersionExpired()
+            raise HTTPException(status_code=error.get("http_code", 500), detail=error)
+
+        event = message.get("result", {})
+        obj = event.get("object", {})
+        resource_version = obj.get("metadata", {}).get("resourceVersion")
+        match event.get("type"):
+            case "ADDED" | "MODIFIED":
+                self._set(extract_argo_workflow(obj))
+            case "DELETED":
+                self._delete(obj.get("metadata", {}).get("name"))
+            case "BOOKMARK":
+                # Only carries the latest resource version
+                pass
+        if resource_version:
+            self.resource_version = resource_version
+
+
+class WorkflowWatch(WorkflowInformer):
+    """
+    Follows a single workflow, with a get instead of a list of the namespace and a
+    watch filtered to the workflow.
+    """
+
+    def __init__(self, client: ArgoClient, namespace: str, name: str):
+        super().__init__(client, namespace)
+        self.name = name
+
+    async def _list(self) -> None:
+        r = await self.client.get(
+            f"/api/v1/workflows/{self.namespace}/{self.name}",
+            params={"fields": f"{WORKFLOW_GET_FIELDS},metadata.resourceVersion"},
+        )
+        # A workflow missing when the watch starts is an error for the caller. Once
+        # the watch is running, it has been deleted
+        if r.status_code != 200 and not (r.status_code == 404 and self._task):
+            raise HTTPException(
+                status_code=r.status_code, detail=parse_argo_error(r.json())
+            )
+        if r.status_code == 404:
+            self.resource_version = None
+            self._delete(self.name)
+        else:
+            obj = r.json()
+            self.resource_version = obj.get("metadata", {}).get("resourceVersion")
+            self._set(extract_argo_workflow(obj))
+        self.synced_at = time.monotonic()
+
+    def _watch_params(self) -> dict:
+        return super()._watch_params() | {
+            "listOptions.fieldSelector": f"metadata.name={self.name}"
+        }
+
+
+class WorkflowIndex:
+    """
+    Lazily starts one informer per namespace, the first time that namespace is read.
+
+    Unless `keep_informers` is set (when the index is used for reads), clients
+    subscribed to changes to a workflow share a watch on that workflow alone, which is
+    stopped when the last of them leaves.
+    """
+
+    def __init__(self, client: ArgoClient, keep_informers: bool = True):
+        self.client = client
+        self.keep_informers = keep_informers
+        self.informers: dict[str, WorkflowInformer] = {}
+        # Watches on single workflows, by namespace and name
+        self.watches: dict[tuple[str, str], WorkflowWatch] = {}
+        self._locks: dict[str | tuple[str, str], asyncio.Lock] = defaultdict(
+            asyncio.Lock
+        )
+        # Number of clients subscribed to changes to each watched workflow
+        self._subscribers: dict[tuple[str, str], int] = defaultdict(int)
+
+    async def informer(self, namespace: str) -> WorkflowInformer:
+        if namespace in self.informers:
+            return self.informers[namespace]
+        async with self._locks[namespace]:
+            if namespace not in self.informers:
+                informer = WorkflowInformer(self.client, namespace)
+                await informer.start()
+                self.informers[namespace] = informer
+        return self.informers[namespace]
+
+    async def _watch(self, namespace: str, name: str) -> WorkflowWatch:
+        key = (namespace, name)
+        async with self._locks[key]:
+            if key not in self.watches:
+                watch = WorkflowWatch(self.client, namespace, name)
+                await watch.start()
+                self.watches[key] = watch
+        return self.watches[key]
+
+    @asynccontextmanager
+    async def subscribe(
+        self, namespace: str, name: str
+    ) -> AsyncIterator[tuple[WorkflowInformer, asyncio.Queue]]:
+        """
+        Receive every change to a workflow on a queue, with None when it is deleted,
+        along with an informer holding the workflow.
+        """
+        if self.keep_informers:
+            informer = await self.informer(namespace)
+            with informer.subscribe(name) as changes:
+                yield informer, changes
+            return
+
+        key = (namespace, name)
+        self._subscribers[key] += 1
+        try:
+            watch = await self._watch(namespace, name)
+            with watch.subscribe(name) as changes:
+                yield watch, changes
+        finally:
+            self._subscribers[key] -= 1
+            if not self._subscribers[key]:
+                del self._subscribers[key]
+                self._locks.pop(key, None)
+                if key in self.watches:
+                    await self.watches.pop(key).stop()
+
+    async def close(self) -> None:
+        for informer in [*self.informers.values(), *self.watches.values()]:
+            await informer.stop()
+        self.informers = {}
+        self.watches = {}
+
+
+workflow_index = WorkflowIndex(argo_client, keep_informers=WORKFLOW_INDEX_ENABLED)
+
+CallbackMetric(
+    "fridge_workflow_index_staleness_seconds",
+    "Seconds since the workflow index was last known to be in sync with Argo",
+    labelnames=("namespace",),
+    callback=lambda: {
+        (namespace,): informer.staleness()
+        for namespace, informer in workflow_index.informers.items()
+    },
+)
+CallbackMetric(
+    "fridge_workflow_index_workflows",
+    "Number of workflows held in the workflow index",
+    labelnames=("namespace",),
+    callback=lambda: {
+        (namespace,): len(informer.workflows)
+        for namespace, informer in workflow_index.informers.items()
+    },
+)
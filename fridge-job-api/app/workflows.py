@@ -1,45 +1,289 @@
+import asyncio
+import heapq
+import httpx
 import json
-import requests
-from fastapi import APIRouter, Depends, HTTPException
+import orjson
+from collections.abc import AsyncIterator, Callable
+from datetime import datetime
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from typing import Annotated, Any, Union
 from .config import (
-    ARGO_SERVER,
-    VERIFY_TLS,
+    ARGO_BATCH_MAX_SIZE,
+    ARGO_LIST_PAGE_SIZE,
+    ARGO_LOG_CONCURRENCY,
+    ARGO_LOG_MAX_CONNECTIONS,
+    ARGO_LOG_MAX_PODS,
+    ARGO_SUBMIT_MAX_CONCURRENCY,
+    ARGO_SUBMIT_RETRIES,
+    ARGO_SWEEP_MAX_RUNS,
+    FAST_RESPONSES,
+    WORKFLOW_GET_FIELDS,
+    WORKFLOW_INDEX_ENABLED,
+    WORKFLOW_INDEX_MAX_STALENESS,
+    WORKFLOW_LIST_FIELDS,
+    WORKFLOW_STATUS_FIELDS,
+    argo_client,
+    argo_log_client,
     verify_request,
-    argo_token,
     Workflow,
+    WorkflowStatus,
+    WorkflowStatusQuery,
     WorkflowTemplate,
+    WorkflowTemplateBatch,
+    WorkflowSweep,
+    build_sweep_workflow,
     parse_argo_error,
+    extract_argo_workflow,
     extract_argo_workflows,
     extract_argo_workflow_templates,
+    list_options,
     parse_parameters,
+    sweep_items,
+    workflow_fields,
+    workflow_pods,
 )
+from .admission import admission
+from .argo_client import ArgoClient
+from .instrumentation import TimedRoute, timed
+from .workflow_index import WorkflowInformer, workflow_index
 
-router = APIRouter(tags=["Argo Workflows"])
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+# Phases in which a workflow has finished
+COMPLETED_PHASES = {"Succeeded", "Failed", "Error"}
+# Longest time a request can wait for a workflow to change phase
+WORKFLOW_WAIT_MAX_SECONDS = 300
+# Interval between keep-alive comments on idle event streams
+SSE_KEEPALIVE_SECONDS = 15
+# Longest time an aggregated log waits for connections to Argo to become free
+LOG_CONNECTIONS_WAIT_SECONDS = 10
+
+# Connections to Argo free for aggregated logs. Each log takes one for every pod before
+# opening any, one log at a time, so that logs waiting for connections do not each
+# hold some and block one another
+log_connections = asyncio.Semaphore(ARGO_LOG_MAX_CONNECTIONS)
+log_connections_lock = asyncio.Lock()
+
+router = APIRouter(tags=["Argo Workflows"], route_class=TimedRoute)
 
 
 @router.get("/workflows/{namespace}", tags=["Argo Workflows"])
 async def get_workflows(
     namespace: Annotated[str, "The namespace to list workflows from"],
+    response: Response,
     verbose: Annotated[
         bool, "Return verbose output - full details of all workflows"
     ] = False,
+    limit: Annotated[
+        int | None, Query(ge=1, description="Maximum number of workflows per page")
+    ] = None,
+    continue_token: Annotated[
+        str | None,
+        Query(alias="continue", description="Continue token from a previous page"),
+    ] = None,
+    accept: Annotated[str | None, Header()] = None,
     verified: Annotated[bool, "Verify the request with basic auth"] = Depends(
         verify_request
     ),
 ) -> list[Workflow] | Workflow | dict:
-    r = requests.get(
-        f"{ARGO_SERVER}/api/v1/workflows/{namespace}",
-        verify=VERIFY_TLS,
-        headers={"Authorization": f"Bearer {argo_token()}"},
+    """
+    List workflows in a namespace.
+
+    Use `limit` and `continue` to page through large namespaces; the token for the next
+    page is returned in the `X-Continue-Token` header, or in `metadata.continue` when
+    verbose. Verbose responses are passed through from Argo unchanged.
+
+    Send `Accept: application/x-ndjson` to stream every workflow in the namespace as one
+    JSON object per line, fetched from Argo one page (of `limit` workflows) at a time.
+    """
+    params = list_options(limit, continue_token)
+    if not verbose:
+        params["fields"] = WORKFLOW_LIST_FIELDS
+    if accept and NDJSON_MEDIA_TYPE in accept:
+        return await _stream_workflows(namespace, params, verbose)
+    if not (verbose or limit or continue_token) and (
+        informer := await _indexed(namespace)
+    ):
+        workflows = informer.list()
+        if FAST_RESPONSES and workflows:
+            return _json_response(workflows, response)
+        return workflows or {
+            "message": "No workflows found in the specified namespace."
+        }
+
+    path = f"/api/v1/workflows/{namespace}"
+    if verbose:
+        return _passthrough(
+            await _open_stream(
+                path,
+                params=params,
+                timeout=argo_client.timeout,
+                retries=argo_client.get_retries,
+            )
+        )
+
+    r = await argo_client.get(path, params=params)
+    if r.status_code != 200:
+        raise HTTPException(
+            status_code=r.status_code, detail=parse_argo_error(r.json())
+        )
+    json_data = r.json()
+    if next_token := json_data.get("metadata", {}).get("continue"):
+        response.headers["X-Continue-Token"] = next_token
+    # Argo omits an empty item list from projected responses
+    json_data.setdefault("items", None)
+    if FAST_RESPONSES and json_data["items"]:
+        return _json_response(
+            [workflow_fields(item) for item in json_data["items"]], response
+        )
+    return extract_argo_workflows(json_data)
+
+
+@timed("serialize")
+def _json_response(content: Any, response: Response) -> Response:
+    """
+    Serialise a large response body straight to JSON, bypassing the validation and
+    encoding that FastAPI applies to a route's return value.
+    """
+    return Response(
+        # Models, like workflows from the index, are written as their field values
+        content=orjson.dumps(content, default=vars),
+        media_type="application/json",
+        headers=response.headers,
     )
+
+
+async def _indexed(namespace: str) -> WorkflowInformer | None:
+    """
+    Return the workflow index for a namespace if it is enabled and in sync with Argo.
+    """
+    if not WORKFLOW_INDEX_ENABLED:
+        return None
+    informer = await workflow_index.informer(namespace)
+    if informer.staleness() > WORKFLOW_INDEX_MAX_STALENESS:
+        return None
+    return informer
+
+
+async def _stream_workflows(
+    namespace: str, params: dict, verbose: bool
+) -> StreamingResponse:
+    """
+    Stream the workflows in a namespace as NDJSON, requesting one page from Argo at a time.
+    The first page is fetched before the response starts so that errors are returned as usual.
+    """
+    path = f"/api/v1/workflows/{namespace}"
+    params = {"listOptions.limit": ARGO_LIST_PAGE_SIZE} | params
+    r = await argo_client.get(path, params=params)
     if r.status_code != 200:
         raise HTTPException(
             status_code=r.status_code, detail=parse_argo_error(r.json())
         )
-    if verbose:
-        return r.json()
-    return extract_argo_workflows(r.json())
+
+    async def lines():
+        page = r.json()
+        while True:
+            for item in page.get("items") or []:
+                if verbose:
+                    yield json.dumps(item) + "\n"
+                else:
+                    yield extract_argo_workflow(item).model_dump_json() + "\n"
+
+            next_token = page.get("metadata", {}).get("continue")
+            if not next_token:
+                return
+            next_page = await argo_client.get(
+                path, params=params | {"listOptions.continue": next_token}
+            )
+            if next_page.status_code != 200:
+                # The response has already started, so report the error in the stream
+                yield json.dumps({"error": parse_argo_error(next_page.json())}) + "\n"
+                return
+            page = next_page.json()
+
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
+
+
+def log_options(
+    container_name: str = "main",
+    tail_lines: Annotated[
+        int | None, Query(ge=0, description="Only return the last lines of the log")
+    ] = None,
+    since_seconds: Annotated[
+        int | None,
+        Query(ge=1, description="Only return lines from the last number of seconds"),
+    ] = None,
+    since_time: Annotated[
+        datetime | None, Query(description="Only return lines after this time")
+    ] = None,
+    limit_bytes: Annotated[
+        int | None, Query(ge=1, description="Maximum number of bytes of log to return")
+    ] = None,
+    timestamps: Annotated[
+        bool, Query(description="Prefix each line with its timestamp")
+    ] = False,
+) -> dict:
+    """
+    Build the Argo log options, so that the log is filtered and truncated by Kubernetes.
+    """
+    if since_seconds is not None and since_time is not None:
+        raise HTTPException(
+            status_code=400,
+            detail="Only one of since_seconds and since_time can be set.",
+        )
+    params = {"logOptions.container": container_name}
+    if tail_lines is not None:
+        params["logOptions.tailLines"] = tail_lines
+    if since_seconds is not None:
+        params["logOptions.sinceSeconds"] = since_seconds
+    if since_time is not None:
+        params["logOptions.sinceTime.seconds"] = int(since_time.timestamp())
+    if limit_bytes is not None:
+        params["logOptions.limitBytes"] = limit_bytes
+    if timestamps:
+        params["logOptions.timestamps"] = "true"
+    return params
+
+
+@router.post("/workflows/{namespace}/status", tags=["Argo Workflows"])
+async def get_workflow_statuses(
+    namespace: Annotated[str, "The namespace of the workflows"],
+    query: WorkflowStatusQuery,
+    verified: Annotated[bool, "Verify the request with basic auth"] = Depends(
+        verify_request
+    ),
+) -> dict[str, WorkflowStatus | None]:
+    """
+    Look up the status of many workflows, selected by name and/or label selector,
+    with a single request to Argo. Requested names that are not found map to null.
+    """
+    if not (query.names or query.label_selector):
+        raise HTTPException(
+            status_code=400, detail="Either names or label_selector must be set."
+        )
+    params = {"fields": WORKFLOW_STATUS_FIELDS}
+    if query.label_selector:
+        params["listOptions.labelSelector"] = query.label_selector
+    if query.names and len(query.names) == 1:
+        params["listOptions.fieldSelector"] = f"metadata.name={query.names[0]}"
+
+    r = await argo_client.get(f"/api/v1/workflows/{namespace}", params=params)
+    if r.status_code != 200:
+        raise HTTPException(
+            status_code=r.status_code, detail=parse_argo_error(r.json())
+        )
+    statuses = {
+        item.get("metadata", {}).get("name"): WorkflowStatus(
+            status=item.get("status", {}).get("phase"),
+            started_at=item.get("status", {}).get("startedAt"),
+            finished_at=item.get("status", {}).get("finishedAt"),
+        )
+        for item in r.json().get("items") or []
+    }
+    if query.names:
+        return {name: statuses.get(name) for name in query.names}
+    return statuses
 
 
 @router.get("/workflows/{namespace}/{workflow_name}/log", tags=["Argo Workflows"])
@@ -47,35 +291,265 @@ async def get_workflow_log(
     namespace: str,
     workflow_name: str,
     pod_name: str | None = None,
-    container_name: str = "main",
+    options: Annotated[dict, "Options for reading the log"] = Depends(log_options),
     verified: Annotated[bool, "Verify the request with basic auth"] = Depends(
         verify_request
     ),
 ):
-    params = {
-        "podName": pod_name or workflow_name,
-        "logOptions.container": container_name,
-    }
+    params = {"podName": pod_name or workflow_name} | options
 
-    r = requests.get(
-        f"{ARGO_SERVER}/api/v1/workflows/{namespace}/{workflow_name}/log",
-        verify=VERIFY_TLS,
-        headers={"Authorization": f"Bearer {argo_token()}"},
+    r = await _open_log(namespace, workflow_name, params)
+    try:
+        lines = [line async for line in _log_lines(r)]
+    finally:
+        await r.aclose()
+    return {"podName": workflow_name, "log": "\n".join(lines)}
+
+
+@router.get(
+    "/workflows/{namespace}/{workflow_name}/log/stream", tags=["Argo Workflows"]
+)
+async def stream_workflow_log(
+    namespace: str,
+    workflow_name: str,
+    pod_name: str | None = None,
+    follow: Annotated[
+        bool, "Keep the stream open and send new lines from running pods"
+    ] = False,
+    options: Annotated[dict, "Options for reading the log"] = Depends(log_options),
+    verified: Annotated[bool, "Verify the request with basic auth"] = Depends(
+        verify_request
+    ),
+) -> StreamingResponse:
+    """
+    Stream the log of a workflow pod as plain text, one line at a time as Argo sends it.
+    """
+    params = {"podName": pod_name or workflow_name} | options
+    if follow:
+        params["logOptions.follow"] = "true"
+
+    r = await _open_log(namespace, workflow_name, params)
+
+    async def content():
+        try:
+            async for line in _log_lines(r):
+                yield line + "\n"
+        finally:
+            await r.aclose()
+
+    return StreamingResponse(content(), media_type="text/plain")
+
+
+@router.get(
+    "/workflows/{namespace}/{workflow_name}/log/aggregate", tags=["Argo Workflows"]
+)
+async def get_aggregated_workflow_log(
+    namespace: str,
+    workflow_name: str,
+    options: Annotated[dict, "Options for reading the log"] = Depends(log_options),
+    verified: Annotated[bool, "Verify the request with basic auth"] = Depends(
+        verify_request
+    ),
+) -> StreamingResponse:
+    """
+    Read the logs of every pod in a workflow concurrently and return them as plain text,
+    merged in timestamp order, with each line prefixed by the name of its workflow node.
+
+    The logs are merged as they are read, holding one line of each pod in memory.
+    Workflows with more than `ARGO_LOG_MAX_PODS` pods are rejected with a 400, and a 503
+    is returned if too many aggregated logs are already being read.
+    """
+    r = await argo_client.get(
+        f"/api/v1/workflows/{namespace}/{workflow_name}",
+        params={"fields": "metadata.name,metadata.annotations,status.nodes"},
+    )
+    if r.status_code != 200:
+        raise HTTPException(
+            status_code=r.status_code, detail=parse_argo_error(r.json())
+        )
+    pods = workflow_pods(r.json())
+    # Every pod keeps a connection to Argo open until its log has been merged
+    if len(pods) > ARGO_LOG_MAX_PODS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"The workflow has {len(pods)} pods, more than the maximum of {ARGO_LOG_MAX_PODS} for an aggregated log.",
+        )
+
+    # Timestamps are always requested from Argo so that the logs can be merged
+    show_timestamps = "logOptions.timestamps" in options
+    params = options | {"logOptions.timestamps": "true"}
+    semaphore = asyncio.Semaphore(ARGO_LOG_CONCURRENCY)
+    release_connections = await _reserve_log_connections(len(pods))
+
+    async def read_pod_log(node_name: str, pod_name: str) -> AsyncIterator[tuple]:
+        """Read the log of a pod as (time, node name, timestamp, line) entries."""
+        try:
+            async with semaphore:
+                r = await _open_log(
+                    namespace,
+                    workflow_name,
+                    params | {"podName": pod_name},
+                    client=argo_log_client,
+                )
+        except HTTPException as e:
+            yield (datetime.min, node_name, "", f"Unable to read log: {e.detail}")
+            return
+        except httpx.TransportError as e:
+            yield (datetime.min, node_name, "", f"Unable to read log: {e!r}")
+            return
+
+        time = datetime.min
+        try:
+            async for line in _log_lines(r):
+                timestamp, _, content = line.partition(" ")
+                try:
+                    time = datetime.fromisoformat(timestamp).replace(tzinfo=None)
+                except ValueError:
+                    # Keep lines without a timestamp after the previous line
+                    timestamp, content = "", line
+                yield (time, node_name, timestamp, content)
+        except httpx.TransportError as e:
+            yield (time, node_name, "", f"Log interrupted: {e!r}")
+        finally:
+            await r.aclose()
+
+    async def content():
+        logs = [
+            read_pod_log(node_name, pod_name) for node_name, pod_name in pods.items()
+        ]
+        try:
+            # A heap of the next entry of each pod log, by time and then pod, so that
+            # entries with the same time stay in order
+            first_entries = await asyncio.gather(*(anext(log, None) for log in logs))
+            heap = [
+                (entry[0], index, entry)
+                for index, entry in enumerate(first_entries)
+                if entry is not None
+            ]
+            heapq.heapify(heap)
+            while heap:
+                _, index, (_, node_name, timestamp, line) = heap[0]
+                prefix = f"{timestamp} " if show_timestamps and timestamp else ""
+                yield f"{prefix}[{node_name}] {line}\n"
+                entry = await anext(logs[index], None)
+                if entry is None:
+                    heapq.heappop(heap)
+                else:
+                    heapq.heapreplace(heap, (entry[0], index, entry))
+        finally:
+            for log in logs:
+                await log.aclose()
+            release_connections()
+
+    # The connections are also released after the response if it never started
+    return StreamingResponse(
+        content(),
+        media_type="text/plain",
+        background=BackgroundTask(release_connections),
+    )
+
+
+async def _reserve_log_connections(count: int) -> Callable[[], None]:
+    """
+    Take connections to Argo for an aggregated log, raising a 503 if they do not become
+    free in time. Returns a function that gives them back, which may be called again.
+    """
+    taken = 0
+
+    async def take():
+        nonlocal taken
+        async with log_connections_lock:
+            while taken < count:
+                await log_connections.acquire()
+                taken += 1
+
+    def release():
+        nonlocal taken
+        for _ in range(taken):
+            log_connections.release()
+        taken = 0
+
+    try:
+        await asyncio.wait_for(take(), LOG_CONNECTIONS_WAIT_SECONDS)
+    except TimeoutError:
+        release()
+        raise HTTPException(
+            status_code=503,
+            detail="Too many workflow logs are being read, please try again later.",
+            headers={"Retry-After": str(LOG_CONNECTIONS_WAIT_SECONDS)},
+        )
+    return release
+
+
+async def _open_log(
+    namespace: str,
+    workflow_name: str,
+    params: dict,
+    client: ArgoClient = argo_client,
+) -> httpx.Response:
+    """
+    Open a log stream from Argo, raising any error before the response starts.
+    The caller is responsible for closing the returned stream.
+    """
+    return await _open_stream(
+        f"/api/v1/workflows/{namespace}/{workflow_name}/log",
         params=params,
-        stream=True,
+        client=client,
     )
+
+
+async def _open_stream(
+    path: str, client: ArgoClient = argo_client, **kwargs
+) -> httpx.Response:
+    """
+    Send a request to Argo without reading the response, raising any error before the
+    response starts. Unless a timeout is given, the response may take any time to
+    arrive, as log streams do. The caller is responsible for closing the returned
+    stream.
+    """
+    r = await client.stream(path, **kwargs)
     if r.status_code != 200:
+        try:
+            await r.aread()
+        finally:
+            await r.aclose()
         raise HTTPException(
             status_code=r.status_code, detail=parse_argo_error(r.json())
         )
+    return r
+
+
+def _passthrough(
+    r: httpx.Response, prefix: bytes = b"", suffix: bytes = b""
+) -> StreamingResponse:
+    """
+    Send an Argo response body to the client as it arrives, without parsing it.
+    Optional `prefix` and `suffix` bytes are written around the body.
+    """
+
+    async def content():
+        try:
+            yield prefix
+            async for chunk in r.aiter_bytes():
+                yield chunk
+            yield suffix
+        finally:
+            await r.aclose()
+
+    return StreamingResponse(
+        content(), media_type=r.headers.get("content-type", "application/json")
+    )
 
-    lines = []
-    for line in r.iter_lines():
+
+async def _log_lines(r: httpx.Response) -> AsyncIterator[str]:
+    """
+    Decode the lines of an Argo log stream into the log content.
+    """
+    async for line in r.aiter_lines():
         if line:
             parsed = json.loads(line)
             if "result" in parsed:
-                lines.append(parsed["result"].get("content", ""))
-    return {"podName": workflow_name, "log": "\n".join(lines)}
+                yield parsed["result"].get("content", "")
 
 
 @router.get("/workflows/{namespace}/{workflow_name}", tags=["Argo Workflows"])
@@ -85,24 +559,164 @@ async def get_single_workflow(
     verbose: Annotated[
         bool, "Return verbose output - full details of the workflow"
     ] = False,
+    wait_for: Annotated[
+        str | None,
+        Query(
+            description="Wait until the workflow reaches one of these comma-separated phases, e.g. Succeeded,Failed"
+        ),
+    ] = None,
+    timeout: Annotated[
+        float,
+        Query(
+            ge=0,
+            le=WORKFLOW_WAIT_MAX_SECONDS,
+            description="Maximum number of seconds to wait for",
+        ),
+    ] = 30,
     verified: Annotated[bool, "Verify the request with basic auth"] = Depends(
         verify_request
     ),
 ) -> list[Workflow] | Workflow | dict:
-    r = requests.get(
-        f"{ARGO_SERVER}/api/v1/workflows/{namespace}/{workflow_name}",
-        verify=VERIFY_TLS,
-        headers={"Authorization": f"Bearer {argo_token()}"},
-    )
+    """
+    Get a workflow.
+
+    With `wait_for`, the request is held until the workflow reaches one of the given
+    phases or `timeout` expires, and then returns the workflow as usual.
+    """
+    if wait_for:
+        workflow = await _wait_for_phase(
+            namespace, workflow_name, set(wait_for.split(",")), timeout
+        )
+        if workflow is None:
+            raise _workflow_not_found(workflow_name)
+        if not verbose:
+            return workflow
+
+    if not verbose and (informer := await _indexed(namespace)):
+        return await _current_workflow(namespace, workflow_name, informer)
+
+    path = f"/api/v1/workflows/{namespace}/{workflow_name}"
+    if verbose:
+        return _passthrough(
+            await _open_stream(
+                path, timeout=argo_client.timeout, retries=argo_client.get_retries
+            )
+        )
+
+    r = await argo_client.get(path, params={"fields": WORKFLOW_GET_FIELDS})
     if r.status_code != 200:
         raise HTTPException(
             status_code=r.status_code, detail=parse_argo_error(r.json())
         )
-    if verbose:
-        return r.json()
     return extract_argo_workflows(r.json())
 
 
+@router.get("/workflows/{namespace}/{workflow_name}/events", tags=["Argo Workflows"])
+async def stream_workflow_events(
+    namespace: Annotated[str, "The namespace of the workflow"],
+    workflow_name: Annotated[str, "The name of the workflow to follow"],
+    verified: Annotated[bool, "Verify the request with basic auth"] = Depends(
+        verify_request
+    ),
+) -> StreamingResponse:
+    """
+    Follow the phase of a workflow with Server-Sent Events.
+
+    A `phase` event is sent with the current workflow and then on every phase change,
+    until the workflow completes. A `deleted` event is sent if the workflow is deleted.
+    Changes come from a watch on Argo shared by all clients following the workflow, or
+    from the workflow index when it is enabled.
+    """
+    workflow = await _current_workflow(
+        namespace, workflow_name, await _indexed(namespace)
+    )
+
+    async def events():
+        async with workflow_index.subscribe(namespace, workflow_name) as (
+            informer,
+            changes,
+        ):
+            current = informer.get(workflow_name) or workflow
+            yield _server_sent_event("phase", current)
+            while current.status not in COMPLETED_PHASES:
+                try:
+                    change = await asyncio.wait_for(
+                        changes.get(), SSE_KEEPALIVE_SECONDS
+                    )
+                except TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if change is None:
+                    yield _server_sent_event("deleted", current)
+                    return
+                if change.status != current.status:
+                    yield _server_sent_event("phase", change)
+                current = change
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+def _server_sent_event(event: str, workflow: Workflow) -> str:
+    return f"event: {event}\ndata: {workflow.model_dump_json()}\n\n"
+
+
+async def _current_workflow(
+    namespace: str, workflow_name: str, informer: WorkflowInformer | None
+) -> Workflow:
+    """
+    Get a workflow from the index, or from Argo if there is no index or it has not seen
+    the workflow yet.
+    """
+    if informer and (workflow := informer.get(workflow_name)):
+        return workflow
+    r = await argo_client.get(
+        f"/api/v1/workflows/{namespace}/{workflow_name}",
+        params={"fields": WORKFLOW_GET_FIELDS},
+    )
+    if r.status_code != 200:
+        raise HTTPException(
+            status_code=r.status_code, detail=parse_argo_error(r.json())
+        )
+    return extract_argo_workflow(r.json())
+
+
+async def _wait_for_phase(
+    namespace: str, workflow_name: str, phases: set[str], timeout: float
+) -> Workflow | None:
+    """
+    Wait until a workflow reaches one of the phases, or the timeout expires, using the
+    watch on Argo. Returns the latest workflow, or None if it was deleted.
+    """
+    async with workflow_index.subscribe(namespace, workflow_name) as (
+        informer,
+        changes,
+    ):
+        workflow = await _current_workflow(namespace, workflow_name, informer)
+        deadline = asyncio.get_running_loop().time() + timeout
+        while workflow is not None and workflow.status not in phases:
+            try:
+                workflow = await asyncio.wait_for(
+                    changes.get(), deadline - asyncio.get_running_loop().time()
+                )
+            except TimeoutError:
+                break
+    return workflow
+
+
+def _workflow_not_found(workflow_name: str) -> HTTPException:
+    return HTTPException(
+        status_code=404,
+        detail={
+            "error": "Workflow not found.",
+            "response": f'workflows.argoproj.io "{workflow_name}" not found',
+        },
+    )
+
+
 @router.get("/workflowtemplates/{namespace}", tags=["Argo Workflows"])
 async def list_workflow_templates(
     namespace: str,
@@ -113,11 +727,7 @@ async def list_workflow_templates(
         verify_request
     ),
 ) -> list[WorkflowTemplate] | WorkflowTemplate | dict | Union[list, WorkflowTemplate]:
-    r = requests.get(
-        f"{ARGO_SERVER}/api/v1/workflow-templates/{namespace}",
-        verify=VERIFY_TLS,
-        headers={"Authorization": f"Bearer {argo_token()}"},
-    )
+    r = await argo_client.get(f"/api/v1/workflow-templates/{namespace}")
     if r.status_code != 200:
         raise HTTPException(
             status_code=r.status_code, detail=parse_argo_error(r.json())
@@ -140,11 +750,7 @@ async def get_workflow_template(
         verify_request
     ),
 ) -> WorkflowTemplate | dict | Union[Any, WorkflowTemplate]:
-    r = requests.get(
-        f"{ARGO_SERVER}/api/v1/workflow-templates/{namespace}/{template_name}",
-        verify=VERIFY_TLS,
-        headers={"Authorization": f"Bearer {argo_token()}"},
-    )
+    r = await argo_client.get(f"/api/v1/workflow-templates/{namespace}/{template_name}")
     if r.status_code != 200:
         raise HTTPException(
             status_code=r.status_code, detail=parse_argo_error(r.json())
@@ -170,24 +776,26 @@ async def submit_workflow_from_template(
         verify_request
     ),
 ) -> dict:
-    r = requests.post(
-        f"{ARGO_SERVER}/api/v1/workflows/{workflow_template.namespace}/submit",
-        verify=VERIFY_TLS,
-        headers={"Authorization": f"Bearer {argo_token()}"},
-        data=json.dumps(
-            {
-                "resourceKind": "WorkflowTemplate",
-                "resourceName": workflow_template.template_name,
-                "submitOptions": {
-                    "parameters": (
-                        parse_parameters(workflow_template.parameters)
-                        if workflow_template.parameters
-                        else []
-                    )
-                },
-            }
-        ),
+    path = f"/api/v1/workflows/{workflow_template.namespace}/submit"
+    options = _submit_options(
+        workflow_template.template_name, workflow_template.parameters
     )
+    if verbose:
+        # Write the workflow from Argo into the response as it is, without parsing it
+        async with admission.admit(workflow_template.namespace) as admitted:
+            r = await _open_stream(
+                path, method="POST", json=options, timeout=argo_client.timeout
+            )
+            admitted.accepted = r.status_code == 200
+        prefix = (
+            f'{{"workflow_submitted":{workflow_template.model_dump_json()},'
+            f'"status":{r.status_code},"response":'
+        )
+        return _passthrough(r, prefix=prefix.encode(), suffix=b"}")
+
+    async with admission.admit(workflow_template.namespace) as admitted:
+        r = await argo_client.post(path, json=options)
+        admitted.accepted = r.status_code == 200
     if r.status_code != 200:
         raise HTTPException(
             status_code=r.status_code, detail=parse_argo_error(r.json())
@@ -195,5 +803,144 @@ async def submit_workflow_from_template(
     return {
         "workflow_submitted": workflow_template,
         "status": r.status_code,
+        "response": extract_argo_workflows(r.json()),
+    }
+
+
+@router.post("/workflowevents/from_template/batch", tags=["Argo Workflows"])
+async def submit_workflows_from_template(
+    batch: WorkflowTemplateBatch,
+    concurrency: Annotated[
+        int,
+        Query(
+            ge=1,
+            le=ARGO_SUBMIT_MAX_CONCURRENCY,
+            description="Maximum number of submissions sent to Argo at the same time",
+        ),
+    ] = 10,
+    verified: Annotated[bool, "Verify the request with basic auth"] = Depends(
+        verify_request
+    ),
+) -> StreamingResponse:
+    """
+    Submit one workflow from a template for each set of parameters.
+
+    Results are streamed as NDJSON in the order the submissions complete, one line per
+    parameter set with its `index` and either the submitted `workflow` name or an `error`.
+    Rate limited submissions, and submissions that could not reach Argo, are retried
+    with backoff. Submissions rejected by admission control are returned with a 429
+    status.
+    """
+    if len(batch.parameter_sets) > ARGO_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"The batch has {len(batch.parameter_sets)} parameter sets, more than the maximum of {ARGO_BATCH_MAX_SIZE}.",
+        )
+    path = f"/api/v1/workflows/{batch.namespace}/submit"
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def submit(index: int, parameters: list[dict]) -> dict:
+        async with semaphore:
+            try:
+                async with admission.admit(batch.namespace) as admitted:
+                    r = await argo_client.post(
+                        path,
+                        json=_submit_options(batch.template_name, parameters),
+                        retries=ARGO_SUBMIT_RETRIES,
+                    )
+                    admitted.accepted = r.status_code == 200
+            except httpx.HTTPError as e:
+                return {"index": index, "status": 502, "error": str(e)}
+            except HTTPException as e:
+                return {"index": index, "status": e.status_code, "error": e.detail}
+        if r.status_code != 200:
+            try:
+                body = r.json()
+            except ValueError:
+                body = {}
+            # Errors Argo reports that are not recognised are returned as its message
+            error = parse_argo_error(body) or body.get("message") or r.text
+            return {"index": index, "status": r.status_code, "error": error}
+        return {
+            "index": index,
+            "status": r.status_code,
+            "workflow": r.json().get("metadata", {}).get("name"),
+        }
+
+    async def results():
+        tasks = [
+            asyncio.create_task(submit(index, parameters))
+            for index, parameters in enumerate(batch.parameter_sets)
+        ]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield json.dumps(await task) + "\n"
+        finally:
+            # Stop submitting if the client goes away
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(results(), media_type=NDJSON_MEDIA_TYPE)
+
+
+@router.post("/workflowevents/from_template/sweep", tags=["Argo Workflows"])
+async def submit_workflow_sweep(
+    sweep: WorkflowSweep,
+    verbose: Annotated[
+        bool, "Return verbose output - full details of the workflow"
+    ] = False,
+    verified: Annotated[bool, "Verify the request with basic auth"] = Depends(
+        verify_request
+    ),
+) -> dict:
+    """
+    Submit a parameter sweep over a workflow template as a single workflow.
+
+    The grid is expanded into one run per combination of values and the runs are
+    scheduled by Argo, at most `parallelism` at a time. Swept parameters must be inputs
+    of the template's entrypoint.
+    """
+    items = sweep_items(sweep)
+    if len(items) > ARGO_SWEEP_MAX_RUNS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"The sweep has {len(items)} runs, more than the maximum of {ARGO_SWEEP_MAX_RUNS}.",
+        )
+
+    r = await argo_client.get(
+        f"/api/v1/workflow-templates/{sweep.namespace}/{sweep.template_name}"
+    )
+    if r.status_code != 200:
+        raise HTTPException(
+            status_code=r.status_code, detail=parse_argo_error(r.json())
+        )
+    workflow = build_sweep_workflow(r.json(), sweep, items)
+
+    async with admission.admit(sweep.namespace) as admitted:
+        r = await argo_client.post(
+            f"/api/v1/workflows/{sweep.namespace}", json={"workflow": workflow}
+        )
+        admitted.accepted = r.status_code == 200
+    if r.status_code != 200:
+        raise HTTPException(
+            status_code=r.status_code, detail=parse_argo_error(r.json())
+        )
+    return {
+        "workflow_submitted": sweep,
+        "runs": len(items),
+        "status": r.status_code,
         "response": r.json() if verbose else extract_argo_workflows(r.json()),
     }
+
+
+def _submit_options(template_name: str, parameters: list[dict] | None) -> dict:
+    """
+    Build the Argo request body to submit a workflow from a workflow template.
+    """
+    return {
+        "resourceKind": "WorkflowTemplate",
+        "resourceName": template_name,
+        "submitOptions": {
+            "parameters": parse_parameters(parameters) if parameters else []
+        },
+    }
@@ -0,0 +1,16 @@
+"""
+Placeholder configuration, so that benchmarks can import the API's modules without
+Argo or Minio. The Minio client is created, but not connected, when `app.config` is
+imported. Import this module before any module of the API.
+"""
+
+import os
+
+for name, value in {
+    "ARGO_SERVER": "http://127.0.0.1:2746",
+    "ARGO_TOKEN": "token",
+    "MINIO_URL": "127.0.0.1:9000",
+    "MINIO_ACCESS_KEY": "minio",
+    "MINIO_SECRET_KEY": "minio123",
+}.items():
+    os.environ.setdefault(name, value)
@@ -0,0 +1,212 @@
+"""
+A fake Argo Workflows server for benchmarking the API, serving a fixed set of
+synthetic workflows after a configurable delay.
+
+Configured with environment variables:
+
+- `FAKE_DELAY`: Seconds to wait before each response (default `0.2`)
+- `FAKE_WORKFLOWS`: Number of workflows in each namespace (default `50`)
+- `FAKE_NODES`: Number of pods in each workflow (default `5`)
+- `FAKE_LOG_LINES`: Number of lines in the log of each pod (default `20`)
+
+Run with `uv run uvicorn benchmarks.fake_argo:app --port 2746`.
+"""
+
+import asyncio
+import functools
+import json
+import os
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+DELAY = float(os.getenv("FAKE_DELAY", 0.2))
+WORKFLOWS = int(os.getenv("FAKE_WORKFLOWS", 50))
+NODES = int(os.getenv("FAKE_NODES", 5))
+LOG_LINES = int(os.getenv("FAKE_LOG_LINES", 20))
+
+TEMPLATE_SPEC = {
+    "entrypoint": "main",
+    "arguments": {"parameters": [{"name": "message", "value": "hello"}]},
+    "templates": [{"name": "main", "inputs": {"parameters": [{"name": "message"}]}}],
+}
+
+
+def workflow(i: int, namespace: str) -> dict:
+    name = f"wf-{i}"
+    return {
+        "metadata": {
+            "name": name,
+            "namespace": namespace,
+            "creationTimestamp": "2025-01-01T00:00:00Z",
+            "resourceVersion": str(i),
+        },
+        "spec": {"workflowTemplateRef": {"name": "hello"}},
+        "status": {
+            "phase": "Succeeded" if i % 3 else "Running",
+            "startedAt": "2025-01-01T00:00:01Z",
+            "finishedAt": "2025-01-01T00:01:00Z",
+            "nodes": {
+                f"{name}-{j}": {
+                    "id": f"{name}-{j}",
+                    "name": f"{name}[0].step{j}",
+                    "displayName": f"step{j}",
+                    "type": "Pod",
+                    "templateName": "main",
+                    "phase": "Succeeded",
+                    "outputs": {"result": "x" * 200},
+                }
+                for j in range(NODES)
+            },
+        },
+    }
+
+
+@functools.cache
+def workflows(namespace: str) -> list[dict]:
+    return [workflow(i, namespace) for i in range(WORKFLOWS)]
+
+
+def project(obj: dict, fields: str | None) -> dict:
+    """Keep only the comma-separated field paths requested with Argo's fields option."""
+    if not fields:
+        return obj
+    result = {}
+    for field in fields.split(","):
+        path = field.split(".")
+        if path[0] == "items" and obj.get("items"):
+            result.setdefault("items", [{} for _ in obj["items"]])
+            for source, target in zip(obj["items"], result["items"]):
+                _copy(source, target, path[1:])
+        elif path[0] != "items":
+            _copy(obj, result, path)
+    return result
+
+
+def _copy(source: dict, target: dict, path: list[str]) -> None:
+    for key in path[:-1]:
+        if key not in source:
+            return
+        source = source[key]
+        target = target.setdefault(key, {})
+    if path[-1] in source:
+        target[path[-1]] = source[path[-1]]
+
+
+async def version(request: Request) -> JSONResponse:
+    return JSONResponse({"version": "v3.6.10"})
+
+
+async def list_workflows(request: Request) -> JSONResponse:
+    await asyncio.sleep(DELAY)
+    params = request.query_params
+    items = workflows(request.path_params["ns"])
+    start = int(params.get("listOptions.continue") or 0)
+    limit = int(params.get("listOptions.limit") or 0)
+    end = start + limit if limit else len(items)
+    metadata = {"resourceVersion": "1000"}
+    if end < len(items):
+        metadata["continue"] = str(end)
+    return JSONResponse(
+        project(
+            {"metadata": metadata, "items": items[start:end] or None},
+            params.get("fields"),
+        )
+    )
+
+
+async def get_workflow(request: Request) -> JSONResponse:
+    await asyncio.sleep(DELAY)
+    name = request.path_params["name"]
+    if (
+        not name.startswith("wf-")
+        or not name[3:].isdigit()
+        or int(name[3:]) >= WORKFLOWS
+    ):
+        return JSONResponse(
+            {"code": 5, "message": f'workflows.argoproj.io "{name}" not found'},
+            status_code=404,
+        )
+    return JSONResponse(
+        project(
+            workflows(request.path_params["ns"])[int(name[3:])],
+            request.query_params.get("fields"),
+        )
+    )
+
+
+async def list_templates(request: Request) -> JSONResponse:
+    await asyncio.sleep(DELAY)
+    namespace = request.path_params["ns"]
+    return JSONResponse(
+        {
+            "items": [
+                {
+                    "metadata": {"name": "hello", "namespace": namespace},
+                    "spec": TEMPLATE_SPEC,
+                }
+            ]
+        }
+    )
+
+
+async def get_template(request: Request) -> JSONResponse:
+    await asyncio.sleep(DELAY)
+    return JSONResponse(
+        {
+            "metadata": {
+                "name": request.path_params["name"],
+                "namespace": request.path_params["ns"],
+            },
+            "spec": TEMPLATE_SPEC,
+        }
+    )
+
+
+async def submit(request: Request) -> JSONResponse:
+    await asyncio.sleep(DELAY)
+    body = await request.json()
+    submit.count += 1
+    return JSONResponse(
+        {
+            "metadata": {
+                "name": f"{body['resourceName']}-{submit.count}",
+                "namespace": request.path_params["ns"],
+                "creationTimestamp": "2025-01-01T00:00:00Z",
+            },
+            "status": {},
+        }
+    )
+
+
+submit.count = 0
+
+
+async def log(request: Request) -> StreamingResponse:
+    pod = request.query_params.get("podName") or request.path_params["name"]
+    timestamps = request.query_params.get("logOptions.timestamps") == "true"
+
+    async def lines():
+        await asyncio.sleep(DELAY)
+        for i in range(LOG_LINES):
+            content = f"line {i} from {pod}"
+            if timestamps:
+                content = f"2025-01-01T00:{i // 60 % 60:02d}:{i % 60:02d}Z {content}"
+            yield json.dumps({"result": {"content": content, "podName": pod}}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/json")
+
+
+app = Starlette(
+    routes=[
+        Route("/api/v1/version", version),
+        Route("/api/v1/workflows/{ns}", list_workflows),
+        Route("/api/v1/workflows/{ns}/submit", submit, methods=["POST"]),
+        Route("/api/v1/workflows/{ns}/{name}/log", log),
+        Route("/api/v1/workflows/{ns}/{name}", get_workflow),
+        Route("/api/v1/workflow-templates/{ns}", list_templates),
+        Route("/api/v1/workflow-templates/{ns}/{name}", get_template),
+    ]
+)
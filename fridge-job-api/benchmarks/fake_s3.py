@@ -0,0 +1,102 @@
+"""
+A fake S3 server for benchmarking uploads through the API. It accepts single and
+multipart uploads, discards the data, and reports what it received at `/_stats`.
+
+Configured with environment variables:
+
+- `PART_DELAY`: Seconds to wait before answering each part upload (default `0`)
+- `FAIL_PART`: Number of a part to fail with a server error, to check that failed
+  uploads are aborted (default `0`, no failures)
+
+Run with `uv run uvicorn benchmarks.fake_s3:app --port 9000`.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import uuid
+from urllib.parse import parse_qs
+
+PART_DELAY = float(os.getenv("PART_DELAY", 0))
+FAIL_PART = int(os.getenv("FAIL_PART", 0))
+NAMESPACE = "http://s3.amazonaws.com/doc/2006-03-01/"
+
+uploads: dict[str, dict[int, str]] = {}
+stats = {"objects": 0, "parts": 0, "completed": 0, "aborted": 0, "bytes": 0}
+
+
+def xml(element: str, body: str) -> bytes:
+    return (
+        f'<?xml version="1.0" encoding="UTF-8"?>'
+        f'<{element} xmlns="{NAMESPACE}">{body}</{element}>'
+    ).encode()
+
+
+async def read_body(receive) -> int:
+    size = 0
+    more_body = True
+    while more_body:
+        message = await receive()
+        size += len(message.get("body", b""))
+        more_body = message.get("more_body", False)
+    return size
+
+
+async def app(scope, receive, send):
+    if scope["type"] != "http":
+        return
+    method, path = scope["method"], scope["path"]
+    query = {
+        key: values[0]
+        for key, values in parse_qs(
+            scope["query_string"].decode(), keep_blank_values=True
+        ).items()
+    }
+    size = await read_body(receive)
+    stats["bytes"] += size
+    status, headers, body = 200, [], b""
+
+    if path == "/_stats":
+        body = json.dumps(stats | {"open_uploads": len(uploads)}).encode()
+    elif "location" in query:
+        body = xml("LocationConstraint", "")
+    elif method == "POST" and "uploads" in query:
+        upload_id = uuid.uuid4().hex
+        uploads[upload_id] = {}
+        _, bucket, key = path.split("/", 2)
+        body = xml(
+            "InitiateMultipartUploadResult",
+            f"<Bucket>{bucket}</Bucket><Key>{key}</Key><UploadId>{upload_id}</UploadId>",
+        )
+    elif method == "PUT" and "partNumber" in query:
+        await asyncio.sleep(PART_DELAY)
+        part_number = int(query["partNumber"])
+        if part_number == FAIL_PART:
+            status = 500
+            body = b"<Error><Code>InternalError</Code><Message>Part failed</Message></Error>"
+        else:
+            etag = hashlib.md5(f"{query['uploadId']}{part_number}".encode()).hexdigest()
+            uploads.setdefault(query["uploadId"], {})[part_number] = etag
+            stats["parts"] += 1
+            headers.append((b"etag", f'"{etag}"'.encode()))
+    elif method == "POST" and "uploadId" in query:
+        uploads.pop(query["uploadId"], None)
+        stats["completed"] += 1
+        _, bucket, key = path.split("/", 2)
+        body = xml(
+            "CompleteMultipartUploadResult",
+            f"<Location>http://127.0.0.1:9000{path}</Location>"
+            f"<Bucket>{bucket}</Bucket><Key>{key}</Key><ETag>&quot;etag&quot;</ETag>",
+        )
+    elif method == "DELETE" and "uploadId" in query:
+        uploads.pop(query["uploadId"], None)
+        stats["aborted"] += 1
+        status = 204
+    elif method == "PUT":
+        stats["objects"] += 1
+        headers.append((b"etag", b'"etag"'))
+
+    headers.append((b"content-length", str(len(body)).encode()))
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
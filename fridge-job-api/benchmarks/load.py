@@ -0,0 +1,66 @@
+"""
+Send concurrent GET requests to the API and report the throughput and latency.
+
+Used to compare blocking and pooled asynchronous Argo clients, for example:
+
+    uv run python benchmarks/load.py /workflowtemplates/argo-workflows \\
+        --requests 200 --concurrency 100
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+
+async def run(
+    url: str, requests: int, concurrency: int, auth: tuple[str, str]
+) -> list[float]:
+    latencies = []
+    slots = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(auth=auth, timeout=None, limits=limits) as client:
+
+        async def request() -> None:
+            async with slots:
+                start = time.perf_counter()
+                r = await client.get(url)
+                latencies.append(time.perf_counter() - start)
+                r.raise_for_status()
+
+        await asyncio.gather(*(request() for _ in range(requests)))
+    return latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("path", help="Path of the API route to request")
+    parser.add_argument("--api", default="http://127.0.0.1:8000")
+    parser.add_argument("--user", default="admin")
+    parser.add_argument("--password", default="password")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=100)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    latencies = asyncio.run(
+        run(
+            args.api + args.path,
+            args.requests,
+            args.concurrency,
+            (args.user, args.password),
+        )
+    )
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2]
+    p99 = latencies[int(len(latencies) * 0.99)]
+    print(
+        f"{args.path}: {args.requests / elapsed:.1f} req/s, "
+        f"p50 {p50 * 1000:.0f} ms, p99 {p99 * 1000:.0f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Compare the size of Argo's workflow list with and without the fields option, and time
+the non-verbose and verbose workflow list routes of the API.
+
+Run the fake Argo server with large workflows, for example with
+`FAKE_WORKFLOWS=500 FAKE_NODES=200 FAKE_DELAY=0`, then:
+
+    uv run python benchmarks/projection.py argo-workflows
+"""
+
+import argparse
+import time
+
+import httpx
+
+# The fields the API requests from Argo for non-verbose workflow listings
+LIST_FIELDS = (
+    "metadata,items.metadata.name,items.metadata.namespace,"
+    "items.metadata.creationTimestamp,items.status.phase"
+)
+
+
+def best_time(client: httpx.Client, url: str, params: dict, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        client.get(url, params=params).raise_for_status()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("namespace")
+    parser.add_argument("--argo", default="http://127.0.0.1:2746")
+    parser.add_argument("--api", default="http://127.0.0.1:8000")
+    parser.add_argument("--user", default="admin")
+    parser.add_argument("--password", default="password")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    argo_url = f"{args.argo}/api/v1/workflows/{args.namespace}"
+    with httpx.Client(timeout=None) as argo:
+        full = len(argo.get(argo_url).content)
+        projected = len(argo.get(argo_url, params={"fields": LIST_FIELDS}).content)
+    print(f"Argo list: {full / 1e6:.1f} MB, {projected / 1e3:.0f} kB with fields")
+
+    api_url = f"{args.api}/workflows/{args.namespace}"
+    with httpx.Client(auth=(args.user, args.password), timeout=None) as api:
+        for verbose in (False, True):
+            elapsed = best_time(api, api_url, {"verbose": verbose}, args.repeat)
+            print(
+                f"GET /workflows/{{namespace}}?verbose={verbose}: {elapsed * 1000:.0f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
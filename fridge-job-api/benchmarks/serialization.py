@@ -0,0 +1,71 @@
+"""
+Time building and serialising a non-verbose workflow listing the default way, as
+validated Workflow models encoded by FastAPI, against the FAST_RESPONSES path:
+
+    uv run python -m benchmarks.serialization
+"""
+
+import asyncio
+import time
+
+import benchmarks.app_env  # noqa: F401, configures the API before it is imported
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from app import workflows
+from app.config import extract_argo_workflows, workflow_fields
+
+ROUTE = next(
+    route for route in workflows.router.routes if route.path == "/workflows/{namespace}"
+)
+
+
+async def default(argo_response: dict) -> bytes:
+    content = await serialize_response(
+        field=ROUTE.response_field,
+        response_content=extract_argo_workflows(argo_response),
+        is_coroutine=True,
+    )
+    return JSONResponse(content).body
+
+
+async def fast(argo_response: dict) -> bytes:
+    items = [workflow_fields(item) for item in argo_response["items"]]
+    return workflows._json_response(items, Response()).body
+
+
+def argo_response(count: int) -> dict:
+    return {
+        "items": [
+            {
+                "metadata": {
+                    "name": f"wf-{i}",
+                    "namespace": "argo-workflows",
+                    "creationTimestamp": "2025-01-01T00:00:00Z",
+                },
+                "status": {"phase": "Succeeded"},
+            }
+            for i in range(count)
+        ]
+    }
+
+
+async def main() -> None:
+    print(f"{'items':>8} {'default':>10} {'fast':>10}")
+    for count in (1_000, 10_000, 100_000):
+        response = argo_response(count)
+        times, bodies = [], []
+        for serialise in (default, fast):
+            best = float("inf")
+            for _ in range(5):
+                start = time.perf_counter()
+                body = await serialise(response)
+                best = min(best, time.perf_counter() - start)
+            times.append(best)
+            bodies.append(body)
+        assert bodies[0] == bodies[1], "the fast path changed the response body"
+        print(f"{count:>8} {times[0] * 1000:>7.1f} ms {times[1] * 1000:>7.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
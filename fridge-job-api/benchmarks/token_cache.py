@@ -0,0 +1,51 @@
+"""
+Time reading the Argo service account token from its file on every call against the
+cached ServiceAccountToken, and check that a rotated token is picked up:
+
+    uv run python -m benchmarks.token_cache
+"""
+
+import base64
+import json
+import os
+import tempfile
+import time
+import timeit
+
+import benchmarks.app_env  # noqa: F401, configures the API before it is imported
+from app.config import ServiceAccountToken
+
+CALLS = 200_000
+
+
+def write_token(path: str, signature: str) -> None:
+    claims = json.dumps({"exp": time.time() + 3600}).encode()
+    payload = base64.urlsafe_b64encode(claims).decode().rstrip("=")
+    # Replace the file as Kubernetes does when it rotates a projected token
+    with open(f"{path}.new", "w") as f:
+        f.write(f"header.{payload}.{signature}")
+    os.replace(f"{path}.new", path)
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "token")
+        write_token(path, "first")
+
+        def read_file() -> str:
+            with open(path, "r") as f:
+                return f.read().strip()
+
+        cached = ServiceAccountToken(path)
+        for name, get in [("read file every call", read_file), ("cached", cached.get)]:
+            elapsed = timeit.timeit(get, number=CALLS)
+            print(f"{name}: {elapsed / CALLS * 1e6:.2f} us/call")
+
+        write_token(path, "second")
+        time.sleep(cached.check_interval)
+        assert cached.get().endswith(".second"), "the rotated token was not read"
+        print(f"rotated token read, {cached.reloads} reloads in total")
+
+
+if __name__ == "__main__":
+    main()
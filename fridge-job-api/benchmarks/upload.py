@@ -0,0 +1,70 @@
+"""
+Upload a generated file through `POST /object/{bucket}/upload` and report the upload
+rate, what the fake S3 server received and, given the API's process ID on Linux, the
+API's peak memory use:
+
+    uv run python benchmarks/upload.py 1024 --pid $(pgrep -f "uvicorn app.main:app")
+"""
+
+import argparse
+import os
+import time
+import uuid
+
+import httpx
+
+CHUNK = os.urandom(1024 * 1024)
+
+
+def multipart_body(boundary: str, size_mb: int):
+    """A multipart form with a file of `size_mb` MB, generated as it is sent."""
+    yield (
+        f"--{boundary}\r\n"
+        'Content-Disposition: form-data; name="file"; filename="upload.bin"\r\n'
+        "Content-Type: application/octet-stream\r\n\r\n"
+    ).encode()
+    for _ in range(size_mb):
+        yield CHUNK
+    yield f"\r\n--{boundary}--\r\n".encode()
+
+
+def peak_rss_mb(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmHWM"):
+                return int(line.split()[1]) // 1024
+    raise ValueError(f"No peak memory use found for process {pid}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("size_mb", type=int, help="Size of the file in MB")
+    parser.add_argument("--bucket", default="ingress")
+    parser.add_argument("--pid", type=int, help="Process ID of the API")
+    parser.add_argument("--api", default="http://127.0.0.1:8000")
+    parser.add_argument("--s3", default="http://127.0.0.1:9000")
+    parser.add_argument("--user", default="admin")
+    parser.add_argument("--password", default="password")
+    args = parser.parse_args()
+
+    boundary = uuid.uuid4().hex
+    start = time.perf_counter()
+    r = httpx.post(
+        f"{args.api}/object/{args.bucket}/upload",
+        content=multipart_body(boundary, args.size_mb),
+        headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+        auth=(args.user, args.password),
+        timeout=None,
+    )
+    elapsed = time.perf_counter() - start
+    print(
+        f"{args.size_mb} MB: {r.status_code} in {elapsed:.1f} s, "
+        f"{args.size_mb / elapsed:.0f} MB/s"
+    )
+    print(f"S3 received: {httpx.get(f'{args.s3}/_stats').json()}")
+    if args.pid:
+        print(f"API peak RSS: {peak_rss_mb(args.pid)} MB")
+
+
+if __name__ == "__main__":
+    main()
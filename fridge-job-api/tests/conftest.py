@@ -0,0 +1,207 @@
+"""
+Fixtures for testing the API against mocked Argo Workflows and MinIO servers.
+"""
+
+import hashlib
+import inspect
+import io
+import os
+from collections.abc import Callable
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+# The configuration is read when the app is first imported
+os.environ.update(
+    ARGO_SERVER="http://argo.test",
+    ARGO_TOKEN="token",
+    MINIO_URL="minio.test:9000",
+    MINIO_ACCESS_KEY="minio",
+    MINIO_SECRET_KEY="minio123",
+    FRIDGE_API_ADMIN="admin",
+    FRIDGE_API_PASSWORD="password",
+)
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from minio.datatypes import Part
+from minio.error import S3Error
+
+from app.config import argo_client, argo_log_client, minio_client
+from app.main import app
+from app.minio_client import MultipartUploads
+
+Handler = Callable[[httpx.Request], httpx.Response]
+
+
+class FakeArgo:
+    """
+    A mocked Argo Workflows server. Tests add a handler for each method and path they
+    expect the API to request, and any other request gets a 404.
+    """
+
+    def __init__(self):
+        self.handlers: dict[tuple[str, str], Handler] = {}
+        self.requests: list[httpx.Request] = []
+
+    def on(self, method: str, path: str, handler: Handler | dict) -> None:
+        """Answer requests with a handler, or always with the given JSON."""
+        if isinstance(handler, dict):
+            self.handlers[method, path] = lambda request, body=handler: httpx.Response(
+                200, json=body
+            )
+        else:
+            self.handlers[method, path] = handler
+
+    def requested(self, method: str, path: str) -> list[httpx.Request]:
+        return [
+            request
+            for request in self.requests
+            if request.method == method and request.url.path == path
+        ]
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        handler = self.handlers.get((request.method, request.url.path))
+        if handler is None:
+            return httpx.Response(
+                404, json={"code": 5, "message": f"{request.url.path} not found"}
+            )
+        response = handler(request)
+        return await response if inspect.isawaitable(response) else response
+
+
+class FakeMinio:
+    """
+    An in-memory stand-in for the minio client, with the methods the API calls.
+    """
+
+    def __init__(self):
+        self.objects: dict[tuple[str, str], bytes] = {}
+        self.uploads: dict[str, dict[int, bytes]] = {}
+        self.last_modified = datetime(2025, 1, 1, 10, tzinfo=timezone.utc)
+
+    def _error(self, code: str, message: str) -> S3Error:
+        return S3Error(
+            response=None,
+            code=code,
+            message=message,
+            resource=None,
+            request_id=None,
+            host_id=None,
+        )
+
+    @staticmethod
+    def etag(data: bytes) -> str:
+        return hashlib.md5(data).hexdigest()
+
+    def stat_object(self, bucket, object_name, version_id=None):
+        if (bucket, object_name) not in self.objects:
+            raise self._error("NoSuchKey", "The specified key does not exist.")
+        data = self.objects[bucket, object_name]
+        return SimpleNamespace(
+            etag=self.etag(data), size=len(data), last_modified=self.last_modified
+        )
+
+    def get_object(
+        self,
+        bucket,
+        object_name,
+        offset=0,
+        length=0,
+        request_headers=None,
+        version_id=None,
+    ):
+        data = self.objects[bucket, object_name]
+        if (request_headers or {}).get("If-Match", f'"{self.etag(data)}"') != (
+            f'"{self.etag(data)}"'
+        ):
+            raise self._error("PreconditionFailed", "The object has changed.")
+        body = io.BytesIO(data[offset : offset + length] if length else data[offset:])
+        return SimpleNamespace(
+            stream=lambda chunk_size: iter(lambda: body.read(chunk_size), b""),
+            close=lambda: None,
+            release_conn=lambda: None,
+        )
+
+    def put_object(self, bucket, object_name, data, length, content_type=None):
+        self.objects[bucket, object_name] = data.read(length)
+        return SimpleNamespace(
+            location=f"http://minio.test:9000/{bucket}/{object_name}", version_id=None
+        )
+
+    def _create_multipart_upload(self, bucket_name, object_name, headers):
+        upload_id = f"upload-{len(self.uploads) + 1}"
+        self.uploads[upload_id] = {}
+        return upload_id
+
+    def _upload_part(
+        self, bucket_name, object_name, data, headers, upload_id, part_number
+    ):
+        if upload_id not in self.uploads:
+            raise self._error("NoSuchUpload", "The upload does not exist.")
+        self.uploads[upload_id][part_number] = bytes(data)
+        return self.etag(data)
+
+    def _list_parts(self, bucket_name, object_name, upload_id, part_number_marker=None):
+        if upload_id not in self.uploads:
+            raise self._error("NoSuchUpload", "The upload does not exist.")
+        return SimpleNamespace(
+            parts=[
+                Part(number, self.etag(data), size=len(data))
+                for number, data in sorted(self.uploads[upload_id].items())
+            ],
+            is_truncated=False,
+            next_part_number_marker=None,
+        )
+
+    def _complete_multipart_upload(self, bucket_name, object_name, upload_id, parts):
+        if upload_id not in self.uploads:
+            raise self._error("NoSuchUpload", "The upload does not exist.")
+        uploaded = self.uploads.pop(upload_id)
+        self.objects[bucket_name, object_name] = b"".join(
+            uploaded[part.part_number] for part in parts
+        )
+        return SimpleNamespace(
+            location=f"http://minio.test:9000/{bucket_name}/{object_name}",
+            version_id=None,
+        )
+
+    def _abort_multipart_upload(self, bucket_name, object_name, upload_id):
+        if self.uploads.pop(upload_id, None) is None:
+            raise self._error("NoSuchUpload", "The upload does not exist.")
+
+
+FAKE_ARGO = FakeArgo()
+
+
+@pytest.fixture(scope="session")
+def client():
+    """
+    A client for the API, with Argo and MinIO mocked. One client, and so one event
+    loop, is shared by every test, as the app's locks and semaphores belong to a loop.
+    """
+    for argo in (argo_client, argo_log_client):
+        argo.client = httpx.AsyncClient(
+            base_url=argo.server, transport=httpx.MockTransport(FAKE_ARGO.handle)
+        )
+    with TestClient(app) as client:
+        client.auth = ("admin", "password")
+        yield client
+
+
+@pytest.fixture
+def argo(client) -> FakeArgo:
+    FAKE_ARGO.handlers = {}
+    FAKE_ARGO.requests = []
+    argo_client.breaker.record_success()
+    return FAKE_ARGO
+
+
+@pytest.fixture
+def minio(client) -> FakeMinio:
+    fake = FakeMinio()
+    minio_client.client = fake
+    minio_client.multipart = MultipartUploads(fake)
+    minio_client.breaker.record_success()
+    return fake
@@ -0,0 +1,112 @@
+import json
+
+import httpx
+
+from app.config import ARGO_LOG_MAX_PODS
+
+WORKFLOW_PATH = "/api/v1/workflows/argo-workflows/wf"
+LOG_PATH = f"{WORKFLOW_PATH}/log"
+
+
+def workflow(pods: int) -> dict:
+    """A workflow with pods named after their node IDs."""
+    return {
+        "metadata": {
+            "name": "wf",
+            "annotations": {"workflows.argoproj.io/pod-name-format": "v1"},
+        },
+        "status": {
+            "nodes": {
+                "wf": {"id": "wf", "name": "wf", "type": "Steps"},
+                **{
+                    f"wf-{i}": {
+                        "id": f"wf-{i}",
+                        "name": f"wf[0].step{i}",
+                        "type": "Pod",
+                    }
+                    for i in range(pods)
+                },
+            }
+        },
+    }
+
+
+def log_response(lines: list[str]) -> httpx.Response:
+    return httpx.Response(
+        200,
+        content="".join(
+            json.dumps({"result": {"content": line}}) + "\n" for line in lines
+        ),
+    )
+
+
+def test_pod_logs_are_merged_by_timestamp(client, argo):
+    argo.on("GET", WORKFLOW_PATH, workflow(2))
+    logs = {
+        "wf-0": ["2025-01-01T00:00:01Z first", "2025-01-01T00:00:04Z fourth"],
+        "wf-1": ["2025-01-01T00:00:02Z second", "2025-01-01T00:00:03Z third"],
+    }
+    argo.on(
+        "GET",
+        LOG_PATH,
+        lambda request: log_response(logs[request.url.params["podName"]]),
+    )
+
+    r = client.get("/workflows/argo-workflows/wf/log/aggregate")
+
+    assert r.status_code == 200
+    assert r.text.splitlines() == [
+        "[wf[0].step0] first",
+        "[wf[0].step1] second",
+        "[wf[0].step1] third",
+        "[wf[0].step0] fourth",
+    ]
+    # Timestamps are always requested so that the logs can be merged
+    assert all(
+        request.url.params["logOptions.timestamps"] == "true"
+        for request in argo.requested("GET", LOG_PATH)
+    )
+
+
+def test_timestamps_are_shown_when_requested(client, argo):
+    argo.on("GET", WORKFLOW_PATH, workflow(1))
+    argo.on("GET", LOG_PATH, lambda request: log_response(["2025-01-01T00:00:01Z a"]))
+
+    r = client.get(
+        "/workflows/argo-workflows/wf/log/aggregate", params={"timestamps": True}
+    )
+
+    assert r.text == "2025-01-01T00:00:01Z [wf[0].step0] a\n"
+
+
+def test_unreadable_pod_log_does_not_fail_the_response(client, argo):
+    argo.on("GET", WORKFLOW_PATH, workflow(2))
+
+    def log(request: httpx.Request) -> httpx.Response:
+        if request.url.params["podName"] == "wf-0":
+            return httpx.Response(404, json={"code": 5, "message": "pod not found"})
+        return log_response(["2025-01-01T00:00:01Z ok"])
+
+    argo.on("GET", LOG_PATH, log)
+
+    r = client.get("/workflows/argo-workflows/wf/log/aggregate")
+
+    assert r.status_code == 200
+    lines = r.text.splitlines()
+    assert lines[0].startswith("[wf[0].step0] Unable to read log")
+    assert lines[1] == "[wf[0].step1] ok"
+
+
+def test_workflow_with_too_many_pods_is_rejected(client, argo):
+    argo.on("GET", WORKFLOW_PATH, workflow(ARGO_LOG_MAX_PODS + 1))
+
+    r = client.get("/workflows/argo-workflows/wf/log/aggregate")
+
+    assert r.status_code == 400
+    assert not argo.requested("GET", LOG_PATH)
+
+
+def test_missing_workflow_is_not_found(client, argo):
+    r = client.get("/workflows/argo-workflows/wf/log/aggregate")
+
+    assert r.status_code == 404
@@ -0,0 +1,96 @@
+import json
+
+import httpx
+
+import app.workflows
+
+SUBMIT_PATH = "/api/v1/workflows/argo-workflows/submit"
+
+
+def batch(*values: str) -> dict:
+    return {
+        "namespace": "argo-workflows",
+        "template_name": "hello",
+        "parameter_sets": [[{"name": "message", "value": value}] for value in values],
+    }
+
+
+def submitted(request: httpx.Request) -> httpx.Response:
+    """Accept a submission, naming the workflow after its parameter."""
+    body = json.loads(request.content)
+    message = body["submitOptions"]["parameters"][0].split("=", 1)[1]
+    return httpx.Response(200, json={"metadata": {"name": f"hello-{message}"}})
+
+
+def results(r: httpx.Response) -> list[dict]:
+    return sorted(
+        (json.loads(line) for line in r.text.splitlines()),
+        key=lambda result: result["index"],
+    )
+
+
+def test_each_parameter_set_is_submitted(client, argo):
+    argo.on("POST", SUBMIT_PATH, submitted)
+
+    r = client.post("/workflowevents/from_template/batch", json=batch("a", "b", "c"))
+
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    assert results(r) == [
+        {"index": 0, "status": 200, "workflow": "hello-a"},
+        {"index": 1, "status": 200, "workflow": "hello-b"},
+        {"index": 2, "status": 200, "workflow": "hello-c"},
+    ]
+    requests = argo.requested("POST", SUBMIT_PATH)
+    assert len(requests) == 3
+    assert all(
+        json.loads(request.content)["resourceName"] == "hello" for request in requests
+    )
+
+
+def test_rate_limited_submissions_are_retried(client, argo):
+    attempts = []
+
+    def rate_limited(request: httpx.Request) -> httpx.Response:
+        attempts.append(request)
+        if len(attempts) == 1:
+            return httpx.Response(
+                429, headers={"Retry-After": "0.01"}, json={"message": "slow down"}
+            )
+        return submitted(request)
+
+    argo.on("POST", SUBMIT_PATH, rate_limited)
+
+    r = client.post("/workflowevents/from_template/batch", json=batch("a"))
+
+    assert results(r) == [{"index": 0, "status": 200, "workflow": "hello-a"}]
+    assert len(attempts) == 2
+
+
+def test_failed_submissions_do_not_stop_the_batch(client, argo):
+    def submit(request: httpx.Request) -> httpx.Response:
+        if "message=bad" in json.loads(request.content)["submitOptions"]["parameters"]:
+            return httpx.Response(
+                400, json={"code": 3, "message": "invalid parameter value"}
+            )
+        return submitted(request)
+
+    argo.on("POST", SUBMIT_PATH, submit)
+
+    r = client.post("/workflowevents/from_template/batch", json=batch("a", "bad", "c"))
+
+    a, bad, c = results(r)
+    assert a["workflow"] == "hello-a"
+    assert c["workflow"] == "hello-c"
+    assert bad["status"] == 400
+    assert bad["error"] == "invalid parameter value"
+    assert "workflow" not in bad
+
+
+def test_batch_larger_than_the_maximum_is_rejected(client, argo, monkeypatch):
+    monkeypatch.setattr(app.workflows, "ARGO_BATCH_MAX_SIZE", 2)
+
+    r = client.post("/workflowevents/from_template/batch", json=batch("a", "b", "c"))
+
+    assert r.status_code == 400
+    assert not argo.requested("POST", SUBMIT_PATH)
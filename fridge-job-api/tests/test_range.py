@@ -0,0 +1,99 @@
+import hashlib
+
+import pytest
+
+OBJECT = "/object/ingress/data.txt"
+DATA = b"0123456789"
+ETAG = hashlib.md5(DATA).hexdigest()
+
+
+@pytest.fixture
+def stored(minio):
+    minio.objects["ingress", "data.txt"] = DATA
+    return minio
+
+
+def test_whole_object_advertises_ranges(client, stored):
+    r = client.get(OBJECT)
+
+    assert r.status_code == 200
+    assert r.content == DATA
+    assert r.headers["accept-ranges"] == "bytes"
+    assert r.headers["etag"] == f'"{ETAG}"'
+    assert r.headers["last-modified"] == "Wed, 01 Jan 2025 10:00:00 GMT"
+    assert "content-range" not in r.headers
+
+
+@pytest.mark.parametrize(
+    "range_header, content, content_range",
+    [
+        ("bytes=2-5", b"2345", "bytes 2-5/10"),
+        ("bytes=7-", b"789", "bytes 7-9/10"),
+        ("bytes=-3", b"789", "bytes 7-9/10"),
+        ("bytes=8-100", b"89", "bytes 8-9/10"),
+        ("bytes=-100", DATA, "bytes 0-9/10"),
+    ],
+)
+def test_range_is_partial_content(client, stored, range_header, content, content_range):
+    r = client.get(OBJECT, headers={"Range": range_header})
+
+    assert r.status_code == 206
+    assert r.content == content
+    assert r.headers["content-range"] == content_range
+    assert r.headers["content-length"] == str(len(content))
+
+
+@pytest.mark.parametrize("range_header", ["bytes=0-1,4-5", "bytes=5-2", "items=0-1"])
+def test_unsupported_range_gets_the_whole_object(client, stored, range_header):
+    r = client.get(OBJECT, headers={"Range": range_header})
+
+    assert r.status_code == 200
+    assert r.content == DATA
+
+
+def test_range_after_the_end_is_not_satisfiable(client, stored):
+    r = client.get(OBJECT, headers={"Range": "bytes=10-"})
+
+    assert r.status_code == 416
+    assert r.headers["content-range"] == "bytes */10"
+
+
+@pytest.mark.parametrize(
+    "if_range, status_code",
+    [
+        (f'"{ETAG}"', 206),
+        ('"changed"', 200),
+        (f'W/"{ETAG}"', 200),
+        ("Wed, 01 Jan 2025 10:00:00 GMT", 206),
+        ("Tue, 31 Dec 2024 10:00:00 GMT", 200),
+        ("not a date", 200),
+    ],
+)
+def test_if_range_only_sends_a_range_of_the_same_version(
+    client, stored, if_range, status_code
+):
+    r = client.get(OBJECT, headers={"Range": "bytes=2-5", "If-Range": if_range})
+
+    assert r.status_code == status_code
+    assert r.content == (b"2345" if status_code == 206 else DATA)
+
+
+def test_object_replaced_during_a_download_is_not_mixed(client, stored, monkeypatch):
+    stat_object = stored.stat_object
+
+    def stale_stat(*args, **kwargs):
+        stat = stat_object(*args, **kwargs)
+        stat.etag = "stale"
+        return stat
+
+    monkeypatch.setattr(stored, "stat_object", stale_stat)
+
+    r = client.get(OBJECT, headers={"Range": "bytes=2-5"})
+
+    assert r.status_code == 412
+
+
+def test_missing_object_is_not_found(client, minio):
+    r = client.get("/object/ingress/missing.txt", headers={"Range": "bytes=0-1"})
+
+    assert r.status_code == 404
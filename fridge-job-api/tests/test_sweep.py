@@ -0,0 +1,139 @@
+import json
+
+import httpx
+import pytest
+
+TEMPLATE_PATH = "/api/v1/workflow-templates/argo-workflows/train"
+CREATE_PATH = "/api/v1/workflows/argo-workflows"
+
+TEMPLATE = {
+    "metadata": {"name": "train"},
+    "spec": {
+        "entrypoint": "main",
+        "serviceAccountName": "runner",
+        "arguments": {"parameters": [{"name": "dataset", "value": "default"}]},
+        "templates": [
+            {
+                "name": "main",
+                "inputs": {
+                    "parameters": [
+                        {"name": "dataset"},
+                        {"name": "rate"},
+                        {"name": "seed"},
+                    ]
+                },
+            }
+        ],
+    },
+}
+
+
+def sweep(grid: dict, **options) -> dict:
+    return {
+        "namespace": "argo-workflows",
+        "template_name": "train",
+        "grid": grid,
+        **options,
+    }
+
+
+def created(request: httpx.Request) -> httpx.Response:
+    workflow = json.loads(request.content)["workflow"]
+    return httpx.Response(
+        200,
+        json=workflow
+        | {"metadata": {"name": "train-sweep-abc12", "namespace": "argo-workflows"}},
+    )
+
+
+def submitted_run(argo) -> tuple[dict, dict]:
+    """The sweep workflow sent to Argo, and its step running the template."""
+    (request,) = argo.requested("POST", CREATE_PATH)
+    (workflow,) = json.loads(request.content).values()
+    ((run,),) = workflow["spec"]["templates"][0]["steps"]
+    return workflow, run
+
+
+def test_product_sweep_is_submitted_as_one_workflow(client, argo):
+    argo.on("GET", TEMPLATE_PATH, TEMPLATE)
+    argo.on("POST", CREATE_PATH, created)
+
+    r = client.post(
+        "/workflowevents/from_template/sweep",
+        json=sweep(
+            {"rate": ["0.1", "0.2"], "seed": ["1", "2", "3"]},
+            parameters=[{"name": "dataset", "value": "mnist"}],
+            parallelism=2,
+        ),
+    )
+
+    assert r.status_code == 200
+    assert r.json()["runs"] == 6
+    assert r.json()["response"]["name"] == "train-sweep-abc12"
+    workflow, run = submitted_run(argo)
+    assert workflow["spec"]["parallelism"] == 2
+    assert workflow["spec"]["serviceAccountName"] == "runner"
+    assert workflow["spec"]["arguments"]["parameters"] == [
+        {"name": "dataset", "value": "mnist"}
+    ]
+    assert run["templateRef"] == {"name": "train", "template": "main"}
+    assert run["arguments"]["parameters"] == [
+        {"name": "dataset", "value": "{{workflow.parameters.dataset}}"},
+        {"name": "rate", "value": "{{item.rate}}"},
+        {"name": "seed", "value": "{{item.seed}}"},
+    ]
+    assert run["withItems"][0] == {"rate": "0.1", "seed": "1"}
+    assert run["withItems"][-1] == {"rate": "0.2", "seed": "3"}
+
+
+def test_zip_sweep_pairs_values(client, argo):
+    argo.on("GET", TEMPLATE_PATH, TEMPLATE)
+    argo.on("POST", CREATE_PATH, created)
+
+    r = client.post(
+        "/workflowevents/from_template/sweep",
+        json=sweep({"rate": ["0.1", "0.2"], "seed": ["1", "2"]}, mode="zip"),
+    )
+
+    assert r.status_code == 200
+    _, run = submitted_run(argo)
+    assert run["withItems"] == [
+        {"rate": "0.1", "seed": "1"},
+        {"rate": "0.2", "seed": "2"},
+    ]
+
+
+@pytest.mark.parametrize("mode", ["product", "zip"])
+@pytest.mark.parametrize("grid", [{}, {"rate": []}, {"rate": ["0.1"], "seed": []}])
+def test_empty_grid_is_rejected(client, argo, grid, mode):
+    r = client.post("/workflowevents/from_template/sweep", json=sweep(grid, mode=mode))
+
+    assert r.status_code == 400
+    assert not argo.requests
+
+
+def test_zipped_parameters_must_have_the_same_number_of_values(client, argo):
+    r = client.post(
+        "/workflowevents/from_template/sweep",
+        json=sweep({"rate": ["0.1", "0.2"], "seed": ["1"]}, mode="zip"),
+    )
+
+    assert r.status_code == 400
+
+
+def test_swept_parameters_must_be_inputs_of_the_entrypoint(client, argo):
+    argo.on("GET", TEMPLATE_PATH, TEMPLATE)
+
+    r = client.post(
+        "/workflowevents/from_template/sweep", json=sweep({"epochs": ["1", "2"]})
+    )
+
+    assert r.status_code == 400
+    assert "epochs" in r.json()["detail"]
+    assert not argo.requested("POST", CREATE_PATH)
+
+
+def test_missing_template_is_not_found(client, argo):
+    r = client.post("/workflowevents/from_template/sweep", json=sweep({"rate": ["1"]}))
+
+    assert r.status_code == 404
@@ -0,0 +1,60 @@
+import pytest
+
+from app.config import minio_client
+
+
+@pytest.fixture
+def small_parts(monkeypatch):
+    """Upload objects in parts of 4 bytes, one part at a time."""
+    monkeypatch.setattr(minio_client, "part_size", 4)
+    monkeypatch.setattr(minio_client, "upload_concurrency", 1)
+
+
+def upload(client, data: bytes):
+    return client.post(
+        "/object/ingress/upload", files={"file": ("data.txt", data, "text/plain")}
+    )
+
+
+def test_object_smaller_than_a_part_is_uploaded_in_one_request(client, minio):
+    r = upload(client, b"hello")
+
+    assert r.status_code == 200
+    assert r.json()["status"] == 201
+    assert minio.objects["ingress", "data.txt"] == b"hello"
+    assert not minio.uploads
+
+
+def test_larger_object_is_uploaded_in_parts(client, minio, small_parts):
+    uploaded = []
+    upload_part = minio._upload_part
+    minio._upload_part = lambda **kwargs: (
+        uploaded.append(kwargs["part_number"]) or upload_part(**kwargs)
+    )
+
+    r = upload(client, b"0123456789")
+
+    assert r.json()["status"] == 201
+    assert minio.objects["ingress", "data.txt"] == b"0123456789"
+    assert uploaded == [1, 2, 3]
+
+
+def test_failed_part_stops_and_aborts_the_upload(client, minio, small_parts):
+    uploaded = []
+    upload_part = minio._upload_part
+
+    def fail_second_part(**kwargs):
+        uploaded.append(kwargs["part_number"])
+        if kwargs["part_number"] == 2:
+            raise minio._error("InternalError", "Part failed")
+        return upload_part(**kwargs)
+
+    minio._upload_part = fail_second_part
+
+    r = upload(client, b"0123456789abcdef")
+
+    assert r.status_code == 500
+    # No parts are sent after the failure, and the upload is not left behind
+    assert uploaded == [1, 2]
+    assert not minio.uploads
+    assert ("ingress", "data.txt") not in minio.objects
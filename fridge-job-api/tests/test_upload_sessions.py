@@ -0,0 +1,77 @@
+import app.storage
+
+UPLOADS = "/object/ingress/data.bin/uploads"
+
+
+def create_upload(client) -> str:
+    r = client.post(UPLOADS)
+    assert r.status_code == 200
+    assert r.json()["status"] == 201
+    return r.json()["upload_id"]
+
+
+def test_parts_are_assembled_in_order_of_part_number(client, minio):
+    upload_id = create_upload(client)
+
+    for part_number, data in [(2, b"world"), (1, b"hello "), (2, b"there")]:
+        r = client.put(f"{UPLOADS}/{upload_id}/{part_number}", content=data)
+        assert r.status_code == 200
+        assert r.json()["etag"] == minio.etag(data)
+
+    r = client.get(f"{UPLOADS}/{upload_id}")
+    assert [(part["part_number"], part["size"]) for part in r.json()["parts"]] == [
+        (1, 6),
+        (2, 5),
+    ]
+
+    r = client.post(f"{UPLOADS}/{upload_id}/complete")
+    assert r.json()["status"] == 201
+    # A part uploaded again replaces the earlier upload of that part
+    assert minio.objects["ingress", "data.bin"] == b"hello there"
+    assert not minio.uploads
+
+
+def test_aborted_upload_is_discarded(client, minio):
+    upload_id = create_upload(client)
+    client.put(f"{UPLOADS}/{upload_id}/1", content=b"data")
+
+    r = client.delete(f"{UPLOADS}/{upload_id}")
+
+    assert r.status_code == 200
+    assert not minio.uploads
+    assert client.get(f"{UPLOADS}/{upload_id}").status_code == 404
+
+
+def test_unknown_upload_is_not_found(client, minio):
+    assert client.put(f"{UPLOADS}/missing/1", content=b"data").status_code == 404
+    assert client.get(f"{UPLOADS}/missing").status_code == 404
+    assert client.post(f"{UPLOADS}/missing/complete").status_code == 404
+    assert client.delete(f"{UPLOADS}/missing").status_code == 404
+
+
+def test_upload_without_parts_cannot_be_completed(client, minio):
+    upload_id = create_upload(client)
+
+    r = client.post(f"{UPLOADS}/{upload_id}/complete")
+
+    assert r.status_code == 400
+    assert upload_id in minio.uploads
+
+
+def test_part_over_the_maximum_size_is_rejected(client, minio, monkeypatch):
+    monkeypatch.setattr(app.storage, "MINIO_MAX_PART_SIZE", 4)
+    upload_id = create_upload(client)
+
+    r = client.put(f"{UPLOADS}/{upload_id}/1", content=b"12345")
+
+    assert r.status_code == 413
+    assert minio.uploads[upload_id] == {}
+
+
+def test_part_number_must_be_in_range(client, minio):
+    upload_id = create_upload(client)
+
+    assert client.put(f"{UPLOADS}/{upload_id}/0", content=b"data").status_code == 422
+    assert (
+        client.put(f"{UPLOADS}/{upload_id}/10001", content=b"data").status_code == 422
+    )
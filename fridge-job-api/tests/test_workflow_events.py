@@ -0,0 +1,138 @@
+import asyncio
+import json
+
+import httpx
+
+from app.workflow_index import workflow_index
+
+WORKFLOW_PATH = "/api/v1/workflows/argo-workflows/wf"
+WATCH_PATH = "/api/v1/workflow-events/argo-workflows"
+
+
+def workflow(phase: str) -> dict:
+    return {
+        "metadata": {
+            "name": "wf",
+            "namespace": "argo-workflows",
+            "creationTimestamp": "2025-01-01T00:00:00Z",
+            "resourceVersion": "1",
+        },
+        "status": {"phase": phase},
+    }
+
+
+def watch(*events: tuple[str, str]):
+    """A watch on the workflow that sends each (type, phase) event in turn."""
+
+    async def lines():
+        for event_type, phase in events:
+            await asyncio.sleep(0.01)
+            yield (
+                json.dumps({"result": {"type": event_type, "object": workflow(phase)}})
+                + "\n"
+            ).encode()
+
+    return lambda request: httpx.Response(200, content=lines())
+
+
+def server_sent_events(r: httpx.Response) -> list[tuple[str, str]]:
+    events = []
+    for message in r.text.split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in message.splitlines())
+        if "event" in fields:
+            events.append((fields["event"], json.loads(fields["data"])["status"]))
+    return events
+
+
+def test_phase_changes_are_streamed_until_the_workflow_completes(client, argo):
+    argo.on("GET", WORKFLOW_PATH, workflow("Pending"))
+    argo.on(
+        "GET",
+        WATCH_PATH,
+        watch(
+            ("MODIFIED", "Running"),
+            ("MODIFIED", "Running"),
+            ("MODIFIED", "Succeeded"),
+        ),
+    )
+
+    r = client.get("/workflows/argo-workflows/wf/events")
+
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/event-stream")
+    assert server_sent_events(r) == [
+        ("phase", "Pending"),
+        ("phase", "Running"),
+        ("phase", "Succeeded"),
+    ]
+    # The watch is filtered to the workflow, and stopped when the last client leaves
+    (request,) = argo.requested("GET", WATCH_PATH)
+    assert request.url.params["listOptions.fieldSelector"] == "metadata.name=wf"
+    assert not workflow_index.watches
+
+
+def test_deleted_workflow_ends_the_stream(client, argo):
+    argo.on("GET", WORKFLOW_PATH, workflow("Running"))
+    argo.on("GET", WATCH_PATH, watch(("DELETED", "Running")))
+
+    r = client.get("/workflows/argo-workflows/wf/events")
+
+    assert server_sent_events(r) == [("phase", "Running"), ("deleted", "Running")]
+
+
+def test_completed_workflow_is_sent_once(client, argo):
+    argo.on("GET", WORKFLOW_PATH, workflow("Failed"))
+
+    r = client.get("/workflows/argo-workflows/wf/events")
+
+    assert server_sent_events(r) == [("phase", "Failed")]
+
+
+def test_events_for_a_missing_workflow_are_not_found(client, argo):
+    r = client.get("/workflows/argo-workflows/wf/events")
+
+    assert r.status_code == 404
+    assert not argo.requested("GET", WATCH_PATH)
+
+
+def test_wait_for_returns_when_the_workflow_reaches_a_phase(client, argo):
+    argo.on("GET", WORKFLOW_PATH, workflow("Running"))
+    argo.on(
+        "GET",
+        WATCH_PATH,
+        watch(("MODIFIED", "Running"), ("MODIFIED", "Failed")),
+    )
+
+    r = client.get(
+        "/workflows/argo-workflows/wf",
+        params={"wait_for": "Succeeded,Failed", "timeout": 5},
+    )
+
+    assert r.status_code == 200
+    assert r.json()["status"] == "Failed"
+    assert not workflow_index.watches
+
+
+def test_wait_for_returns_the_current_workflow_at_the_timeout(client, argo):
+    argo.on("GET", WORKFLOW_PATH, workflow("Running"))
+    argo.on("GET", WATCH_PATH, watch())
+
+    r = client.get(
+        "/workflows/argo-workflows/wf",
+        params={"wait_for": "Succeeded", "timeout": 0.1},
+    )
+
+    assert r.status_code == 200
+    assert r.json()["status"] == "Running"
+
+
+def test_wait_for_a_deleted_workflow_is_not_found(client, argo):
+    argo.on("GET", WORKFLOW_PATH, workflow("Running"))
+    argo.on("GET", WATCH_PATH, watch(("DELETED", "Running")))
+
+    r = client.get(
+        "/workflows/argo-workflows/wf",
+        params={"wait_for": "Succeeded", "timeout": 5},
+    )
+
+    assert r.status_code == 404